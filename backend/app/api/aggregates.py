@@ -0,0 +1,56 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Iterable
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from ..models.models import InvoiceTotal
+
+# INSERT ... ON CONFLICT DO UPDATE are aceeași formă pe ambele dialecte suportate
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+TOTALS_FIELDS = ('organization_id', 'issue_date', 'due_date', 'total_amount')
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+def totals_row(invoice) -> dict:
+    return {key: getattr(invoice, key) for key in TOTALS_FIELDS}
+
+def adjust_invoice_totals(db: Session, added: Iterable[dict] = (), removed: Iterable[dict] = ()):
+    # Adunăm întâi diferențele pe cheie, ca o factură editată în aceeași lună să fie o singură scriere
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for rows, sign in ((added, 1), (removed, -1)):
+        for row in rows:
+            key = (row['organization_id'], month_start(row['issue_date']), month_start(row['due_date']))
+            deltas[key][0] += sign
+            deltas[key][1] += sign * Decimal(row['total_amount'])
+    params = [
+        {
+            'organization_id': organization_id,
+            'issue_month': issue_month,
+            'due_month': due_month,
+            'invoice_count': invoice_count,
+            'total_amount': total_amount
+        }
+        for (organization_id, issue_month, due_month), (invoice_count, total_amount) in deltas.items()
+        if invoice_count or total_amount
+    ]
+    if not params:
+        return
+
+    upsert = UPSERT_INSERTS[db.get_bind().dialect.name](InvoiceTotal)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[InvoiceTotal.organization_id, InvoiceTotal.issue_month, InvoiceTotal.due_month],
+        set_={
+            'invoice_count': InvoiceTotal.invoice_count + upsert.excluded.invoice_count,
+            'total_amount': InvoiceTotal.total_amount + upsert.excluded.total_amount
+        }
+    )
+    db.execute(upsert, params)
+    organization_ids = {param['organization_id'] for param in params}
+    db.execute(
+        delete(InvoiceTotal)
+        .where(InvoiceTotal.organization_id.in_(organization_ids))
+        .where(InvoiceTotal.invoice_count == 0)
+    )
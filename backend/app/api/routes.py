@@ -1,14 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import and_, case, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from typing import List, Optional
-from ..database import get_db
-from ..models.models import Organization, Invoice, InvoiceItem
-from pydantic import BaseModel, condecimal
+from ..database import ReadSessionLocal, begin_read_transaction, get_async_db, get_db
+from .serializers import (as_float, invoice_header_select, invoice_summary_select,
+                          load_invoice_responses, load_invoice_responses_async)
+from .aggregates import adjust_invoice_totals, month_start, totals_row
+from .search import SEARCH_ENTITIES, index_documents, remove_documents, search_documents
+from ..models.models import Organization, Invoice, InvoiceItem, ChangeLog, InvoiceTotal
+from ..events import queue_changes
+from pydantic import BaseModel, ValidationError, condecimal
 from datetime import date
 from decimal import Decimal
+import base64
+import csv
+import hashlib
+import io
+import json
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+BULK_CHUNK_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_BATCH_SIZE = 1000
+ENTITY_ORGANIZATION = "organization"
+ENTITY_INVOICE = "invoice"
+CHANGE_UPSERT = "upsert"
+CHANGE_DELETE = "delete"
+EXPORT_COLUMNS = [
+    'id', 'organization_id', 'organization_name', 'invoice_number',
+    'issue_date', 'due_date', 'total_amount', 'notes', 'created_at'
+]
+
+# Cursoare opace pentru paginarea keyset
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+# ETag-uri pentru cereri condiționate: resursele individuale folosesc coloana version,
+# listele un hash peste (id, version) al rândurilor din pagină
+def make_etag(*parts) -> str:
+    return '"' + '.'.join(str(part) for part in parts) + '"'
+
+def list_etag(keys: list) -> str:
+    digest = hashlib.blake2b(json.dumps(keys, separators=(",", ":")).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+def invoice_etag(invoice) -> str:
+    # Răspunsul include numele organizației, deci depinde și de versiunea ei
+    return make_etag(invoice['version'], invoice['organization_version'])
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+def not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Resource was modified by another request"
+    )
+
+def check_if_match(if_match: Optional[str], etag: str):
+    if if_match is not None and not etag_matches(if_match, etag):
+        raise precondition_failed()
+
+def bump_version(db: Session, instance):
+    # Comparația cu If-Match s-a făcut pe versiunea citită; UPDATE ... WHERE version = cea citită
+    # o face atomică și blochează rândul, iar o scriere concurentă deja confirmată dă StaleDataError
+    instance.version += 1
+    db.flush()
+
+# Rândurile din SELECT-urile Core au deja forma schemei de răspuns, deci le trimitem direct
+# prin orjson, fără a le mai valida încă o dată prin response_model
+def prevalidated_response(response: Response, content) -> ORJSONResponse:
+    headers = {key: value for key, value in response.headers.items() if key != 'content-length'}
+    return ORJSONResponse(content, headers=headers)
+
+# Jurnalul de modificări se scrie în aceeași tranzacție cu modificarea, chiar înainte de commit
+def record_changes(db: Session, entity: str, entity_ids: list, operation: str):
+    if entity_ids:
+        queue_changes(db, [
+            {'entity': entity, 'entity_id': entity_id, 'operation': operation}
+            for entity_id in entity_ids
+        ])
+
 # Scheme Pydantic
 class OrganizationBase(BaseModel):
     name: str
@@ -21,6 +120,7 @@ class OrganizationCreate(OrganizationBase):
 class OrganizationResponse(OrganizationBase):
     id: int
     created_at: date
+    version: int
 
     class Config:
         from_attributes = True
@@ -31,6 +131,8 @@ class InvoiceItemBase(BaseModel):
     unit_price: float
 
 class InvoiceItemCreate(BaseModel):
+    # id-ul unui item existent, trimis la editare ca să fie actualizat în loc de recreat
+    id: Optional[int] = None
     description: str
     quantity: float
     unit_price: float
@@ -66,6 +168,13 @@ class InvoiceCreate(BaseModel):
     class Config:
         from_attributes = True
 
+class InvoiceUpdate(BaseModel):
+    organization_id: Optional[int] = None
+    invoice_number: Optional[str] = None
+    issue_date: Optional[date] = None
+    due_date: Optional[date] = None
+    notes: Optional[str] = None
+
 class InvoiceResponse(BaseModel):
     id: int
     organization_id: int
@@ -76,58 +185,217 @@ class InvoiceResponse(BaseModel):
     total_amount: float
     notes: Optional[str] = None
     created_at: date
+    version: int
+    organization_version: int
     items: List[InvoiceItemResponse]
 
     class Config:
         from_attributes = True
 
+class InvoiceSummaryResponse(BaseModel):
+    id: int
+    organization_id: int
+    organization_name: str
+    invoice_number: str
+    issue_date: date
+    due_date: date
+    total_amount: float
+    version: int
+    organization_version: int
+
+    class Config:
+        from_attributes = True
+
+class BulkImportError(BaseModel):
+    index: int
+    detail: str
+
+class BulkImportResponse(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkImportError]
+
+class OrganizationReport(BaseModel):
+    organization_id: int
+    organization_name: str
+    invoice_count: int
+    total_amount: float
+    overdue_count: int
+    overdue_amount: float
+
+class PeriodReport(BaseModel):
+    organization_id: int
+    organization_name: str
+    period: str
+    invoice_count: int
+    total_amount: float
+
+class SearchResult(BaseModel):
+    entity: str
+    id: int
+    title: str
+    snippet: str
+    score: float
+
+class ChangeFeedResponse(BaseModel):
+    organizations: List[OrganizationResponse]
+    invoices: List[InvoiceSummaryResponse]
+    deleted_organizations: List[int]
+    deleted_invoices: List[int]
+    next_token: str
+    has_more: bool
+
+def load_invoice_response(db: Session, invoice_id: int) -> Optional[dict]:
+    begin_read_transaction(db)
+    invoices = load_invoice_responses(db, invoice_header_select().where(Invoice.id == invoice_id))
+    return invoices[0] if invoices else None
+
+CENT = Decimal('0.01')
+INVOICE_REQUIRED_FIELDS = ('organization_id', 'invoice_number', 'issue_date', 'due_date')
+
+def item_values(item: dict) -> dict:
+    return {
+        'description': item['description'],
+        'quantity': Decimal(str(item['quantity'])),
+        'unit_price': Decimal(str(item['unit_price'])),
+        'total_price': Decimal(str(item['quantity'] * item['unit_price']))
+    }
+
+def item_changed(current, values: dict) -> bool:
+    if current.description != values['description']:
+        return True
+    # Coloanele sunt Numeric(10, 2), deci comparăm valorile rotunjite la cenți
+    return any(
+        Decimal(getattr(current, key)).quantize(CENT) != values[key].quantize(CENT)
+        for key in ('quantity', 'unit_price', 'total_price')
+    )
+
 # Rute pentru organizații
 @router.post("/organizations/", response_model=OrganizationResponse)
-def create_organization(org: OrganizationCreate, db: Session = Depends(get_db)):
+def create_organization(org: OrganizationCreate, response: Response, db: Session = Depends(get_db)):
     db_org = Organization(**org.dict())
     db.add(db_org)
+    db.flush()
+    record_changes(db, ENTITY_ORGANIZATION, [db_org.id], CHANGE_UPSERT)
+    index_documents(db, ENTITY_ORGANIZATION, [db_org.id])
     db.commit()
+    begin_read_transaction(db)
     db.refresh(db_org)
+    response.headers["ETag"] = make_etag(db_org.version)
     return db_org
 
+# Rutele de citire folosesc sesiunea async, ca interogările lente să nu ocupe thread-uri din pool
 @router.get("/organizations/", response_model=List[OrganizationResponse])
-def get_organizations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(Organization).offset(skip).limit(limit).all()
+async def get_organizations(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    statement = select(Organization).order_by(Organization.id)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, 1)
+        if not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(Organization.id > last_id)
+    else:
+        statement = statement.offset(skip)
+    organizations = (await db.scalars(statement.limit(limit))).all()
+
+    etag = list_etag([[org.id, org.version] for org in organizations])
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+
+    # Pagina e plină, deci probabil mai există rânduri după ultimul id
+    if organizations and len(organizations) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([organizations[-1].id])
+    return organizations
 
 @router.get("/organizations/{org_id}", response_model=OrganizationResponse)
-def get_organization(org_id: int, db: Session = Depends(get_db)):
-    db_org = db.query(Organization).filter(Organization.id == org_id).first()
+async def get_organization(
+    org_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_org = await db.get(Organization, org_id)
     if db_org is None:
         raise HTTPException(status_code=404, detail="Organization not found")
+    etag = make_etag(db_org.version)
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     return db_org
 
+def check_organization_if_match(db_org: Organization, if_match: Optional[str]):
+    check_if_match(if_match, make_etag(db_org.version))
+
 @router.delete("/organizations/{org_id}")
-def delete_organization(org_id: int, db: Session = Depends(get_db)):
+def delete_organization(org_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     db_org = db.query(Organization).filter(Organization.id == org_id).first()
     if db_org is None:
         raise HTTPException(status_code=404, detail="Organization not found")
+    check_organization_if_match(db_org, if_match)
+
+    # Facturile organizației sunt șterse în cascadă, deci primesc și ele tombstone
+    invoice_ids = [invoice_id for (invoice_id,) in db.query(Invoice.id).filter(Invoice.organization_id == org_id)]
+    record_changes(db, ENTITY_INVOICE, invoice_ids, CHANGE_DELETE)
+    record_changes(db, ENTITY_ORGANIZATION, [org_id], CHANGE_DELETE)
+    remove_documents(db, ENTITY_INVOICE, invoice_ids)
+    remove_documents(db, ENTITY_ORGANIZATION, [org_id])
+    db.execute(delete(InvoiceTotal).where(InvoiceTotal.organization_id == org_id))
     
     db.delete(db_org)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise precondition_failed()
     return {"message": "Organization deleted successfully"}
 
 @router.put("/organizations/{org_id}", response_model=OrganizationResponse)
-def update_organization(org_id: int, org: OrganizationCreate, db: Session = Depends(get_db)):
+def update_organization(
+    org_id: int,
+    org: OrganizationCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     db_org = db.query(Organization).filter(Organization.id == org_id).first()
     if db_org is None:
         raise HTTPException(status_code=404, detail="Organization not found")
+    check_organization_if_match(db_org, if_match)
+    try:
+        bump_version(db, db_org)
+    except StaleDataError:
+        db.rollback()
+        raise precondition_failed()
     
     # Actualizăm câmpurile
+    renamed = org.name != db_org.name
     for key, value in org.dict().items():
         setattr(db_org, key, value)
+    record_changes(db, ENTITY_ORGANIZATION, [org_id], CHANGE_UPSERT)
+    index_documents(db, ENTITY_ORGANIZATION, [org_id])
+    if renamed:
+        # Documentele facturilor conțin denumirea organizației
+        invoice_ids = [invoice_id for (invoice_id,) in db.query(Invoice.id).filter(Invoice.organization_id == org_id)]
+        index_documents(db, ENTITY_INVOICE, invoice_ids)
     
     db.commit()
+    begin_read_transaction(db)
     db.refresh(db_org)
+    response.headers["ETag"] = make_etag(db_org.version)
     return db_org
 
 # Rute pentru facturi
 @router.post("/invoices/", response_model=InvoiceResponse)
-def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
+def create_invoice(invoice: InvoiceCreate, response: Response, db: Session = Depends(get_db)):
     try:
         # Verificăm dacă organizația există
         org = db.query(Organization).filter(Organization.id == invoice.organization_id).first()
@@ -146,42 +414,26 @@ def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
         
         # Adăugăm items și calculăm totalul
         for item in items:
-            item_total = Decimal(str(item['quantity'] * item['unit_price']))
-            total_amount += item_total
-            
-            db_item = InvoiceItem(
-                invoice_id=db_invoice.id,
-                description=item['description'],
-                quantity=Decimal(str(item['quantity'])),
-                unit_price=Decimal(str(item['unit_price'])),
-                total_price=item_total
-            )
-            db.add(db_item)
+            values = item_values(item)
+            total_amount += values['total_price']
+            db.add(InvoiceItem(invoice_id=db_invoice.id, **values))
         
         # Actualizăm suma totală
         db_invoice.total_amount = total_amount
+        adjust_invoice_totals(db, added=[totals_row(db_invoice)])
+        invoice_id = db_invoice.id
+        record_changes(db, ENTITY_INVOICE, [invoice_id], CHANGE_UPSERT)
+        index_documents(db, ENTITY_INVOICE, [invoice_id])
         db.commit()
-        db.refresh(db_invoice)
-        
-        return {
-            'id': db_invoice.id,
-            'organization_id': db_invoice.organization_id,
-            'organization_name': org.name,
-            'invoice_number': db_invoice.invoice_number,
-            'issue_date': db_invoice.issue_date,
-            'due_date': db_invoice.due_date,
-            'total_amount': float(db_invoice.total_amount),
-            'notes': db_invoice.notes,
-            'created_at': db_invoice.created_at,
-            'items': [{
-                'id': item.id,
-                'description': item.description,
-                'quantity': float(item.quantity),
-                'unit_price': float(item.unit_price),
-                'total_price': float(item.total_price)
-            } for item in db_invoice.items]
-        }
         
+        # Id-ul se citește înainte de commit; accesul pe obiectul expirat ar redeschide o tranzacție de scriere
+        created = load_invoice_response(db, invoice_id)
+        response.headers["ETag"] = invoice_etag(created)
+        return created
+
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -189,107 +441,516 @@ def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db)):
             detail=f"Could not create invoice: {str(e)}"
         )
 
+def insert_invoice_chunk(db: Session, chunk: list, result: dict):
+    # chunk conține perechi (index, InvoiceCreate) deja validate
+    org_ids = {invoice.organization_id for _, invoice in chunk}
+    numbers = [invoice.invoice_number for _, invoice in chunk]
+    known_orgs = {
+        org_id for (org_id,) in
+        db.query(Organization.id).filter(Organization.id.in_(org_ids))
+    }
+    taken_numbers = {
+        number for (number,) in
+        db.query(Invoice.invoice_number).filter(Invoice.invoice_number.in_(numbers))
+    }
+
+    accepted = []
+    for index, invoice in chunk:
+        if invoice.organization_id not in known_orgs:
+            result['errors'].append({'index': index, 'detail': "Organization not found"})
+        elif invoice.invoice_number in taken_numbers:
+            result['errors'].append({'index': index, 'detail': "Invoice number already exists"})
+        else:
+            taken_numbers.add(invoice.invoice_number)
+            accepted.append((index, invoice))
+    if not accepted:
+        return
+
+    rows = []
+    for index, invoice in accepted:
+        invoice_dict = invoice.dict()
+        items = invoice_dict.pop('items')
+        total_amount = Decimal('0')
+        invoice_items = []
+        for item in items:
+            values = item_values(item)
+            total_amount += values['total_price']
+            invoice_items.append(values)
+        rows.append((index, {**invoice_dict, 'total_amount': total_amount}, invoice_items))
+
+    try:
+        write_invoice_rows(db, rows)
+        db.commit()
+        result['created'] += len(rows)
+        return
+    except Exception:
+        db.rollback()
+
+    # Chunk-ul a eșuat: reluăm rând cu rând, fiecare în savepoint propriu,
+    # ca doar rândurile stricate să fie raportate
+    created = 0
+    failed = []
+    for row in rows:
+        try:
+            with db.begin_nested():
+                write_invoice_rows(db, [row])
+            created += 1
+        except Exception as e:
+            failed.append({'index': row[0], 'detail': f"Could not create invoice: {str(e)}"})
+    try:
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        result['errors'].extend(
+            {'index': index, 'detail': f"Could not create invoice: {str(e)}"} for index, _, _ in rows
+        )
+        return
+    result['created'] += created
+    result['errors'].extend(failed)
+
+def write_invoice_rows(db: Session, rows: list):
+    # rows: (index, coloanele facturii, coloanele articolelor)
+    invoice_rows = [invoice_row for _, invoice_row, _ in rows]
+    # Un singur INSERT multi-rând pentru facturi, id-urile revin în ordinea parametrilor
+    invoice_ids = db.execute(
+        insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True),
+        invoice_rows
+    ).scalars().all()
+
+    flat_items = [
+        {**item, 'invoice_id': invoice_id}
+        for invoice_id, (_, _, invoice_items) in zip(invoice_ids, rows)
+        for item in invoice_items
+    ]
+    if flat_items:
+        db.execute(insert(InvoiceItem), flat_items)
+
+    adjust_invoice_totals(db, added=invoice_rows)
+    record_changes(db, ENTITY_INVOICE, invoice_ids, CHANGE_UPSERT)
+    index_documents(db, ENTITY_INVOICE, invoice_ids)
+
+async def iter_bulk_payload(request: Request):
+    # NDJSON se citește linie cu linie din stream, fără a încărca tot corpul în memorie
+    if request.headers.get('content-type', '').startswith(NDJSON_MEDIA_TYPE):
+        buffer = b''
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON array")
+    for row in payload:
+        yield row
+
+@router.post("/invoices/bulk", response_model=BulkImportResponse)
+async def bulk_create_invoices(request: Request, db: Session = Depends(get_db)):
+    result = {'created': 0, 'errors': []}
+    chunk = []
+    index = 0
+    async for row in iter_bulk_payload(request):
+        try:
+            if isinstance(row, bytes):
+                row = json.loads(row)
+            chunk.append((index, InvoiceCreate(**row)))
+        except ValidationError as e:
+            result['errors'].append({'index': index, 'detail': str(e)})
+        except (ValueError, TypeError) as e:
+            result['errors'].append({'index': index, 'detail': f"Invalid row: {str(e)}"})
+        index += 1
+
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await run_in_threadpool(insert_invoice_chunk, db, chunk, result)
+            chunk = []
+
+    if chunk:
+        await run_in_threadpool(insert_invoice_chunk, db, chunk, result)
+
+    result['errors'].sort(key=lambda error: error['index'])
+    result['failed'] = len(result['errors'])
+    return result
+
+# Cheile de sortare permise, cu parserul valorii din cursor
+INVOICE_SORT_KEYS = {
+    'id': (Invoice.id, int),
+    'issue_date': (Invoice.issue_date, date.fromisoformat),
+    'due_date': (Invoice.due_date, date.fromisoformat),
+    'total_amount': (Invoice.total_amount, Decimal),
+    'invoice_number': (Invoice.invoice_number, str),
+}
+INVOICE_SORT_PATTERN = "^-?(" + "|".join(INVOICE_SORT_KEYS) + ")$"
+
+def invoice_list_filters(
+    organization_id: Optional[int] = None,
+    issue_date_from: Optional[date] = None,
+    issue_date_to: Optional[date] = None,
+    due_date_from: Optional[date] = None,
+    due_date_to: Optional[date] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    number_prefix: Optional[str] = None,
+    ids: Optional[List[int]] = Query(None)
+) -> list:
+    conditions = []
+    if ids:
+        conditions.append(Invoice.id.in_(ids))
+    if organization_id is not None:
+        conditions.append(Invoice.organization_id == organization_id)
+    if issue_date_from is not None:
+        conditions.append(Invoice.issue_date >= issue_date_from)
+    if issue_date_to is not None:
+        conditions.append(Invoice.issue_date <= issue_date_to)
+    if due_date_from is not None:
+        conditions.append(Invoice.due_date >= due_date_from)
+    if due_date_to is not None:
+        conditions.append(Invoice.due_date <= due_date_to)
+    if min_amount is not None:
+        conditions.append(Invoice.total_amount >= min_amount)
+    if max_amount is not None:
+        conditions.append(Invoice.total_amount <= max_amount)
+    if number_prefix:
+        # Interval în loc de LIKE, ca SQLite să poată folosi indexul unic pe invoice_number
+        conditions.append(Invoice.invoice_number >= number_prefix)
+        conditions.append(Invoice.invoice_number < number_prefix + '\U0010ffff')
+    return conditions
+
+def invoice_sort(sort: str = Query('issue_date', pattern=INVOICE_SORT_PATTERN)) -> str:
+    return sort
+
+def parse_invoice_cursor(cursor: Optional[str], sort: str):
+    if not cursor:
+        return None
+    cursor_sort, last_value, last_id = decode_cursor(cursor, 3)
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    parse = INVOICE_SORT_KEYS[sort.lstrip('-')][1]
+    try:
+        return parse(last_value), int(last_id)
+    except (TypeError, ValueError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def paginate_invoices(statement, conditions: list, sort: str, after, skip: int, limit: int):
+    column = INVOICE_SORT_KEYS[sort.lstrip('-')][0]
+    query = statement.where(*conditions)
+    # id este mereu a doua cheie, astfel ordinea e totală și cursorul e stabil
+    if sort.startswith('-'):
+        query = query.order_by(column.desc(), Invoice.id.desc())
+        if after:
+            query = query.filter(or_(column < after[0], and_(column == after[0], Invoice.id < after[1])))
+    else:
+        query = query.order_by(column, Invoice.id)
+        if after:
+            query = query.filter(or_(column > after[0], and_(column == after[0], Invoice.id > after[1])))
+    if not after:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def set_invoice_next_cursor(response: Response, rows, sort: str, limit: int):
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        if not isinstance(last, dict):
+            last = last._asdict()
+        value = last[sort.lstrip('-')]
+        if isinstance(value, date):
+            value = value.isoformat()
+        elif isinstance(value, (Decimal, float)):
+            value = str(value)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([sort, value, last['id']])
+
 @router.get("/invoices/", response_model=List[InvoiceResponse])
-def get_invoices(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_invoices(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    conditions: list = Depends(invoice_list_filters),
+    sort: str = Depends(invoice_sort),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = parse_invoice_cursor(cursor, sort)
+    try:
+        # Antetul vine cu numele organizației din JOIN, iar items într-un singur SELECT ... IN
+        statement = paginate_invoices(invoice_header_select(), conditions, sort, after, skip, limit)
+        invoices = await load_invoice_responses_async(db, statement)
+
+        etag = list_etag([[inv['id'], inv['version'], inv['organization_version']] for inv in invoices])
+        cached = not_modified(if_none_match, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        set_invoice_next_cursor(response, invoices, sort, limit)
+        return prevalidated_response(response, invoices)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error loading invoices: {str(e)}"
+        )
+
+@router.get("/invoices/summary", response_model=List[InvoiceSummaryResponse])
+async def get_invoice_summaries(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    conditions: list = Depends(invoice_list_filters),
+    sort: str = Depends(invoice_sort),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = parse_invoice_cursor(cursor, sort)
     try:
-        invoices = db.query(Invoice).join(Organization).offset(skip).limit(limit).all()
-        response_invoices = []
-        for invoice in invoices:
-            invoice_dict = {
-                'id': invoice.id,
-                'organization_id': invoice.organization_id,
-                'organization_name': invoice.organization.name,
-                'invoice_number': invoice.invoice_number,
-                'issue_date': invoice.issue_date,
-                'due_date': invoice.due_date,
-                'total_amount': float(invoice.total_amount),
-                'notes': invoice.notes,
-                'created_at': invoice.created_at,
-                'items': [{
-                    'id': item.id,
-                    'description': item.description,
-                    'quantity': float(item.quantity),
-                    'unit_price': float(item.unit_price),
-                    'total_price': float(item.total_price)
-                } for item in invoice.items]
-            }
-            response_invoices.append(invoice_dict)
-        return response_invoices
+        statement = paginate_invoices(invoice_summary_select(), conditions, sort, after, skip, limit)
+        rows = (await db.execute(statement)).all()
+
+        etag = list_etag([[row.id, row.version, row.organization_version] for row in rows])
+        cached = not_modified(if_none_match, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
+        set_invoice_next_cursor(response, rows, sort, limit)
+        return prevalidated_response(response, [row._asdict() for row in rows])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error loading invoices: {str(e)}"
         )
 
+def iter_invoice_export(statement, export_format: str):
+    # Sesiune proprie: generatorul rulează după ce handler-ul a returnat
+    db = ReadSessionLocal()
+    try:
+        rows = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for partition in rows.partitions():
+                for row in partition:
+                    writer.writerow([
+                        '' if value is None else value.isoformat() if isinstance(value, date) else value
+                        for value in row
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        else:
+            for partition in rows.partitions():
+                lines = []
+                for row in partition:
+                    data = row._asdict()
+                    data['issue_date'] = data['issue_date'].isoformat()
+                    data['due_date'] = data['due_date'].isoformat()
+                    data['created_at'] = data['created_at'].isoformat() if data['created_at'] else None
+                    data['total_amount'] = float(data['total_amount'])
+                    lines.append(json.dumps(data) + '\n')
+                yield ''.join(lines)
+    finally:
+        db.close()
+
+@router.get("/invoices/export")
+def export_invoices(
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    conditions: list = Depends(invoice_list_filters)
+):
+    statement = (
+        select(
+            Invoice.id,
+            Invoice.organization_id,
+            Organization.name.label('organization_name'),
+            Invoice.invoice_number,
+            Invoice.issue_date,
+            Invoice.due_date,
+            Invoice.total_amount,
+            Invoice.notes,
+            Invoice.created_at
+        )
+        .join(Organization, Invoice.organization_id == Organization.id)
+        .where(*conditions)
+        .order_by(Invoice.issue_date, Invoice.id)
+    )
+
+    if format == 'csv':
+        media_type = "text/csv"
+        filename = "invoices.csv"
+    else:
+        media_type = NDJSON_MEDIA_TYPE
+        filename = "invoices.ndjson"
+    return StreamingResponse(
+        iter_invoice_export(statement, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/invoices/{invoice_id}", response_model=InvoiceResponse)
-def get_invoice(invoice_id: int, db: Session = Depends(get_db)):
-    db_invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
-    if db_invoice is None:
+async def get_invoice(
+    invoice_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    invoices = await load_invoice_responses_async(db, invoice_header_select().where(Invoice.id == invoice_id))
+    if not invoices:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    return db_invoice
+    etag = invoice_etag(invoices[0])
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+    return prevalidated_response(response, invoices[0])
+
+def check_invoice_if_match(db_invoice: Invoice, if_match: Optional[str]):
+    if if_match is not None:
+        check_if_match(if_match, make_etag(db_invoice.version, db_invoice.organization.version))
 
 @router.put("/invoices/{invoice_id}", response_model=InvoiceResponse)
-def update_invoice(invoice_id: int, invoice: InvoiceCreate, db: Session = Depends(get_db)):
+def update_invoice(
+    invoice_id: int,
+    invoice: InvoiceCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     try:
         # Verificăm dacă factura există
         db_invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
         if db_invoice is None:
             raise HTTPException(status_code=404, detail="Invoice not found")
+        check_invoice_if_match(db_invoice, if_match)
+        bump_version(db, db_invoice)
             
         # Verificăm dacă organizația există
         org = db.query(Organization).filter(Organization.id == invoice.organization_id).first()
         if not org:
             raise HTTPException(status_code=404, detail="Organization not found")
 
-        # Ștergem items existente
-        for item in db_invoice.items:
-            db.delete(item)
-            
         # Actualizăm câmpurile de bază
         invoice_dict = invoice.dict()
         items = invoice_dict.pop('items')
+        previous_totals = totals_row(db_invoice)
         
         for key, value in invoice_dict.items():
             setattr(db_invoice, key, value)
-            
-        # Calculăm suma totală și adăugăm items noi
+
+        # Comparăm items primite cu cele existente (după id) și scriem doar diferențele
+        existing = {
+            row.id: row for row in db.execute(
+                select(
+                    InvoiceItem.id,
+                    InvoiceItem.description,
+                    InvoiceItem.quantity,
+                    InvoiceItem.unit_price,
+                    InvoiceItem.total_price
+                ).where(InvoiceItem.invoice_id == invoice_id)
+            )
+        }
+        to_insert = []
+        to_update = []
+        kept_ids = set()
         total_amount = Decimal('0')
         for item in items:
-            item_total = Decimal(str(item['quantity'] * item['unit_price']))
-            total_amount += item_total
-            
-            db_item = InvoiceItem(
-                invoice_id=db_invoice.id,
-                description=item['description'],
-                quantity=Decimal(str(item['quantity'])),
-                unit_price=Decimal(str(item['unit_price'])),
-                total_price=item_total
-            )
-            db.add(db_item)
-            
+            values = item_values(item)
+            total_amount += values['total_price']
+
+            item_id = item.get('id')
+            if item_id is None:
+                to_insert.append({**values, 'invoice_id': invoice_id})
+                continue
+            if item_id not in existing or item_id in kept_ids:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invoice item {item_id} does not belong to this invoice"
+                )
+            kept_ids.add(item_id)
+            if item_changed(existing[item_id], values):
+                to_update.append({**values, 'id': item_id})
+
+        to_delete = existing.keys() - kept_ids
+        if to_delete:
+            db.execute(delete(InvoiceItem).where(InvoiceItem.id.in_(to_delete)))
+        if to_update:
+            db.execute(update(InvoiceItem), to_update)
+        if to_insert:
+            db.execute(insert(InvoiceItem), to_insert)
+
         db_invoice.total_amount = total_amount
+        adjust_invoice_totals(db, added=[totals_row(db_invoice)], removed=[previous_totals])
+        record_changes(db, ENTITY_INVOICE, [invoice_id], CHANGE_UPSERT)
+        index_documents(db, ENTITY_INVOICE, [invoice_id])
         db.commit()
-        db.refresh(db_invoice)
-        
-        return {
-            'id': db_invoice.id,
-            'organization_id': db_invoice.organization_id,
-            'organization_name': org.name,
-            'invoice_number': db_invoice.invoice_number,
-            'issue_date': db_invoice.issue_date,
-            'due_date': db_invoice.due_date,
-            'total_amount': float(db_invoice.total_amount),
-            'notes': db_invoice.notes,
-            'created_at': db_invoice.created_at,
-            'items': [{
-                'id': item.id,
-                'description': item.description,
-                'quantity': float(item.quantity),
-                'unit_price': float(item.unit_price),
-                'total_price': float(item.total_price)
-            } for item in db_invoice.items]
-        }
         
+        updated = load_invoice_response(db, invoice_id)
+        response.headers["ETag"] = invoice_etag(updated)
+        return updated
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except StaleDataError:
+        db.rollback()
+        raise precondition_failed()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Could not update invoice: {str(e)}"
+        )
+
+@router.patch("/invoices/{invoice_id}", response_model=InvoiceResponse)
+def patch_invoice(
+    invoice_id: int,
+    invoice: InvoiceUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    try:
+        db_invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
+        if db_invoice is None:
+            raise HTTPException(status_code=404, detail="Invoice not found")
+        check_invoice_if_match(db_invoice, if_match)
+        bump_version(db, db_invoice)
+
+        # Doar câmpurile trimise; items și totalul rămân neatinse
+        changes = invoice.dict(exclude_unset=True)
+        for key in INVOICE_REQUIRED_FIELDS:
+            if key in changes and changes[key] is None:
+                raise HTTPException(status_code=422, detail=f"{key} cannot be null")
+
+        if 'organization_id' in changes:
+            org = db.query(Organization).filter(Organization.id == changes['organization_id']).first()
+            if not org:
+                raise HTTPException(status_code=404, detail="Organization not found")
+
+        previous_totals = totals_row(db_invoice)
+        for key, value in changes.items():
+            setattr(db_invoice, key, value)
+        adjust_invoice_totals(db, added=[totals_row(db_invoice)], removed=[previous_totals])
+        record_changes(db, ENTITY_INVOICE, [invoice_id], CHANGE_UPSERT)
+        index_documents(db, ENTITY_INVOICE, [invoice_id])
+        db.commit()
+
+        updated = load_invoice_response(db, invoice_id)
+        response.headers["ETag"] = invoice_etag(updated)
+        return updated
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except StaleDataError:
+        db.rollback()
+        raise precondition_failed()
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -298,19 +959,197 @@ def update_invoice(invoice_id: int, invoice: InvoiceCreate, db: Session = Depend
         )
 
 @router.delete("/invoices/{invoice_id}")
-def delete_invoice(invoice_id: int, db: Session = Depends(get_db)):
+def delete_invoice(invoice_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     try:
         db_invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
         if db_invoice is None:
             raise HTTPException(status_code=404, detail="Invoice not found")
+        check_invoice_if_match(db_invoice, if_match)
         
+        record_changes(db, ENTITY_INVOICE, [invoice_id], CHANGE_DELETE)
+        remove_documents(db, ENTITY_INVOICE, [invoice_id])
+        adjust_invoice_totals(db, removed=[totals_row(db_invoice)])
         db.delete(db_invoice)
         db.commit()
         return {"message": "Invoice deleted successfully"}
         
+    except HTTPException:
+        db.rollback()
+        raise
+    except StaleDataError:
+        db.rollback()
+        raise precondition_failed()
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Could not delete invoice: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+# Flux de modificări pentru sincronizarea incrementală a clienților
+@router.get("/changes", response_model=ChangeFeedResponse)
+async def get_changes(
+    since: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    feed = {
+        'organizations': [],
+        'invoices': [],
+        'deleted_organizations': [],
+        'deleted_invoices': [],
+        'has_more': False
+    }
+
+    # Fără token întoarcem doar poziția curentă, de la care clientul poate porni
+    if since is None:
+        latest = await db.scalar(select(func.max(ChangeLog.id)))
+        return {**feed, 'next_token': str(latest or 0)}
+    try:
+        since_id = int(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+
+    entries = (await db.execute(
+        select(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.operation)
+        .where(ChangeLog.id > since_id)
+        .order_by(ChangeLog.id)
+        .limit(limit)
+    )).all()
+
+    # Pentru fiecare entitate contează doar ultima operație din fereastră
+    last_operation = {}
+    for entry in entries:
+        last_operation[(entry.entity, entry.entity_id)] = entry.operation
+    changed = {ENTITY_ORGANIZATION: set(), ENTITY_INVOICE: set()}
+    deleted = {ENTITY_ORGANIZATION: set(), ENTITY_INVOICE: set()}
+    for (entity, entity_id), operation in last_operation.items():
+        (changed if operation == CHANGE_UPSERT else deleted)[entity].add(entity_id)
+
+    if changed[ENTITY_ORGANIZATION]:
+        feed['organizations'] = (await db.scalars(
+            select(Organization).where(Organization.id.in_(changed[ENTITY_ORGANIZATION])).order_by(Organization.id)
+        )).all()
+    if changed[ENTITY_INVOICE]:
+        rows = (await db.execute(
+            invoice_summary_select().where(Invoice.id.in_(changed[ENTITY_INVOICE])).order_by(Invoice.id)
+        )).all()
+        feed['invoices'] = [row._asdict() for row in rows]
+
+    # Entitățile șterse după fereastra curentă nu mai există, deci devin tombstone
+    deleted[ENTITY_ORGANIZATION] |= changed[ENTITY_ORGANIZATION] - {org.id for org in feed['organizations']}
+    deleted[ENTITY_INVOICE] |= changed[ENTITY_INVOICE] - {invoice['id'] for invoice in feed['invoices']}
+    feed['deleted_organizations'] = sorted(deleted[ENTITY_ORGANIZATION])
+    feed['deleted_invoices'] = sorted(deleted[ENTITY_INVOICE])
+
+    feed['next_token'] = str(entries[-1].id) if entries else str(since_id)
+    feed['has_more'] = len(entries) == limit
+    return feed
+
+# Rute pentru rapoarte; citesc agregatul invoice_totals, nu facturile
+@router.get("/reports/organizations", response_model=List[OrganizationReport])
+async def get_organization_report(
+    as_of: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    as_of = as_of or date.today()
+    current_month = month_start(as_of)
+    report = {
+        org.id: {
+            'organization_id': org.id,
+            'organization_name': org.name,
+            'invoice_count': 0,
+            'total_amount': 0.0,
+            'overdue_count': 0,
+            'overdue_amount': 0.0
+        }
+        for org in (await db.execute(
+            select(Organization.id, Organization.name).order_by(Organization.id)
+        )).all()
+    }
+
+    # Lunile de scadență trecute sunt restante în întregime
+    past_due = InvoiceTotal.due_month < current_month
+    totals = await db.execute(
+        select(
+            InvoiceTotal.organization_id,
+            func.sum(InvoiceTotal.invoice_count).label('invoice_count'),
+            as_float(func.sum(InvoiceTotal.total_amount)).label('total_amount'),
+            func.sum(case((past_due, InvoiceTotal.invoice_count), else_=0)).label('overdue_count'),
+            as_float(func.sum(case((past_due, InvoiceTotal.total_amount), else_=0))).label('overdue_amount')
+        ).group_by(InvoiceTotal.organization_id)
+    )
+    for row in totals:
+        if row.organization_id in report:
+            report[row.organization_id].update(
+                invoice_count=row.invoice_count,
+                total_amount=row.total_amount or 0.0,
+                overdue_count=row.overdue_count,
+                overdue_amount=row.overdue_amount or 0.0
+            )
+
+    # Din luna curentă sunt restante doar facturile cu scadența înainte de as_of
+    current_overdue = await db.execute(
+        select(
+            Invoice.organization_id,
+            func.count(Invoice.id).label('overdue_count'),
+            as_float(func.sum(Invoice.total_amount)).label('overdue_amount')
+        )
+        .where(Invoice.due_date >= current_month, Invoice.due_date < as_of)
+        .group_by(Invoice.organization_id)
+    )
+    for row in current_overdue:
+        if row.organization_id in report:
+            report[row.organization_id]['overdue_count'] += row.overdue_count
+            report[row.organization_id]['overdue_amount'] += row.overdue_amount or 0.0
+
+    return list(report.values())
+
+@router.get("/reports/periods", response_model=List[PeriodReport])
+async def get_period_report(
+    organization_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Perioada este luna emiterii facturii
+    statement = (
+        select(
+            InvoiceTotal.organization_id,
+            Organization.name.label('organization_name'),
+            InvoiceTotal.issue_month,
+            func.sum(InvoiceTotal.invoice_count).label('invoice_count'),
+            as_float(func.sum(InvoiceTotal.total_amount)).label('total_amount')
+        )
+        .join(Organization, InvoiceTotal.organization_id == Organization.id)
+        .group_by(InvoiceTotal.organization_id, Organization.name, InvoiceTotal.issue_month)
+        .order_by(InvoiceTotal.organization_id, InvoiceTotal.issue_month)
+    )
+    if organization_id is not None:
+        statement = statement.where(InvoiceTotal.organization_id == organization_id)
+    if date_from is not None:
+        statement = statement.where(InvoiceTotal.issue_month >= month_start(date_from))
+    if date_to is not None:
+        statement = statement.where(InvoiceTotal.issue_month <= date_to)
+
+    return [
+        {
+            'organization_id': row.organization_id,
+            'organization_name': row.organization_name,
+            'period': row.issue_month.strftime('%Y-%m'),
+            'invoice_count': row.invoice_count,
+            'total_amount': row.total_amount
+        }
+        for row in await db.execute(statement)
+    ]
+
+# Căutare full-text în facturi (număr, note, descrieri items) și organizații
+@router.get("/search", response_model=List[SearchResult])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    entity: Optional[str] = Query(None, pattern=f"^({'|'.join(SEARCH_ENTITIES)})$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await search_documents(db, q, entity, skip, limit)
@@ -0,0 +1,142 @@
+import re
+from collections import defaultdict
+from typing import List, Optional
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.orm import Session
+from ..models.models import Organization, Invoice, InvoiceItem
+
+SEARCH_TERM = re.compile(r"\w+", re.UNICODE)
+# Un singur index pentru ambele entități; doc_id le separă fără coloană indexată în plus
+SEARCH_ENTITIES = {'organization': 0, 'invoice': 1}
+
+# search_index este tabel virtual FTS5 pe SQLite (doc_id = rowid) și tabel obișnuit
+# cu index GIN pe tsvector pe PostgreSQL; vezi migrările 0006 și 0007
+DELETE_DOCUMENTS = {
+    'sqlite': "DELETE FROM search_index WHERE rowid IN :doc_ids",
+    'postgresql': "DELETE FROM search_index WHERE doc_id IN :doc_ids",
+}
+INSERT_DOCUMENTS = {
+    'sqlite': "INSERT INTO search_index (rowid, entity, entity_id, title, body) "
+              "VALUES (:doc_id, :entity, :entity_id, :title, :body)",
+    'postgresql': "INSERT INTO search_index (doc_id, entity, entity_id, title, body) "
+                  "VALUES (:doc_id, :entity, :entity_id, :title, :body)",
+}
+# Scor mai mare = rezultat mai relevant; titlul cântărește mai mult decât corpul
+SEARCH_DOCUMENTS = {
+    'sqlite': """
+        SELECT entity, entity_id, title,
+               snippet(search_index, 3, '[', ']', '…', 12) AS snippet,
+               -bm25(search_index, 0, 0, 5.0, 1.0) AS score
+        FROM search_index
+        WHERE search_index MATCH :query AND (:entity IS NULL OR entity = :entity)
+        ORDER BY score DESC, rowid
+        LIMIT :limit OFFSET :skip
+    """,
+    'postgresql': """
+        SELECT entity, entity_id, title,
+               ts_headline('simple', body, query, 'StartSel=[, StopSel=]') AS snippet,
+               ts_rank(to_tsvector('simple', title || ' ' || body), query) AS score
+        FROM search_index, to_tsquery('simple', :query) AS query
+        WHERE to_tsvector('simple', title || ' ' || body) @@ query
+          AND (CAST(:entity AS VARCHAR) IS NULL OR entity = :entity)
+        ORDER BY score DESC, doc_id
+        LIMIT :limit OFFSET :skip
+    """,
+}
+
+def dialect_name(db) -> str:
+    return db.get_bind().dialect.name
+
+def document_id(entity: str, entity_id: int) -> int:
+    return entity_id * len(SEARCH_ENTITIES) + SEARCH_ENTITIES[entity]
+
+def build_search_query(q: str, dialect: str) -> Optional[str]:
+    # Textul utilizatorului nu ajunge direct în sintaxa MATCH; ultimul termen caută și prefixe
+    terms = SEARCH_TERM.findall(q)
+    if not terms:
+        return None
+    if dialect == 'postgresql':
+        return ' & '.join(terms) + ':*'
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+def organization_documents(db: Session, org_ids: list) -> List[dict]:
+    rows = db.execute(
+        select(Organization.id, Organization.name, Organization.fiscal_code, Organization.address)
+        .where(Organization.id.in_(org_ids))
+    )
+    return [
+        {
+            'doc_id': document_id('organization', row.id),
+            'entity': 'organization',
+            'entity_id': row.id,
+            'title': row.name,
+            'body': '\n'.join(filter(None, [row.fiscal_code, row.address]))
+        }
+        for row in rows
+    ]
+
+def invoice_documents(db: Session, invoice_ids: list) -> List[dict]:
+    descriptions = defaultdict(list)
+    for invoice_id, description in db.execute(
+        select(InvoiceItem.invoice_id, InvoiceItem.description)
+        .where(InvoiceItem.invoice_id.in_(invoice_ids))
+        .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+    ):
+        descriptions[invoice_id].append(description)
+    # Denumirea organizației intră în corp, ca factura să fie găsită și după client;
+    # la redenumire update_organization reindexează facturile organizației
+    rows = db.execute(
+        select(Invoice.id, Invoice.invoice_number, Invoice.notes, Organization.name.label('organization_name'))
+        .outerjoin(Organization, Invoice.organization_id == Organization.id)
+        .where(Invoice.id.in_(invoice_ids))
+    )
+    return [
+        {
+            'doc_id': document_id('invoice', row.id),
+            'entity': 'invoice',
+            'entity_id': row.id,
+            'title': row.invoice_number,
+            'body': '\n'.join(filter(None, [row.organization_name, row.notes, *descriptions[row.id]]))
+        }
+        for row in rows
+    ]
+
+DOCUMENT_BUILDERS = {'organization': organization_documents, 'invoice': invoice_documents}
+
+def remove_documents(db: Session, entity: str, entity_ids: list):
+    if entity_ids:
+        db.execute(
+            text(DELETE_DOCUMENTS[dialect_name(db)]).bindparams(bindparam('doc_ids', expanding=True)),
+            {'doc_ids': [document_id(entity, entity_id) for entity_id in entity_ids]}
+        )
+
+def index_documents(db: Session, entity: str, entity_ids: list):
+    # Documentele se rescriu integral; rulează în tranzacția modificării
+    if not entity_ids:
+        return
+    # Sesiunea nu face autoflush, iar documentele se construiesc din rândurile scrise
+    db.flush()
+    remove_documents(db, entity, entity_ids)
+    documents = DOCUMENT_BUILDERS[entity](db, entity_ids)
+    if documents:
+        db.execute(text(INSERT_DOCUMENTS[dialect_name(db)]), documents)
+
+async def search_documents(db, q: str, entity: Optional[str], skip: int, limit: int) -> List[dict]:
+    dialect = dialect_name(db)
+    query = build_search_query(q, dialect)
+    if query is None:
+        return []
+    rows = await db.execute(
+        text(SEARCH_DOCUMENTS[dialect]),
+        {'query': query, 'entity': entity, 'skip': skip, 'limit': limit}
+    )
+    return [
+        {
+            'entity': row.entity,
+            'id': row.entity_id,
+            'title': row.title,
+            'snippet': row.snippet,
+            'score': row.score
+        }
+        for row in rows
+    ]
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from typing import Iterable, List
+from sqlalchemy import Numeric, select, type_coerce
+from sqlalchemy.types import TypeDecorator
+from ..models.models import Organization, Invoice, InvoiceItem
+
+class FloatNumeric(TypeDecorator):
+    # Sumele vin ca float, fără Decimal intermediar. SQLite întoarce însă int pentru valorile
+    # întregi (21 în loc de 21.0), iar răspunsurile pre-validate trebuie să aibă aceeași formă ca POST/PUT
+    impl = Numeric
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(10, 2, asdecimal=False)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else float(value)
+
+def as_float(column):
+    return type_coerce(column, FloatNumeric())
+
+# Etichetele coloanelor sunt chiar cheile din InvoiceResponse / InvoiceItemResponse
+INVOICE_HEADER_COLUMNS = (
+    Invoice.id,
+    Invoice.organization_id,
+    Organization.name.label('organization_name'),
+    Invoice.invoice_number,
+    Invoice.issue_date,
+    Invoice.due_date,
+    as_float(Invoice.total_amount).label('total_amount'),
+    Invoice.notes,
+    Invoice.created_at,
+    Invoice.version,
+    Organization.version.label('organization_version'),
+)
+
+INVOICE_ITEM_COLUMNS = (
+    InvoiceItem.invoice_id,
+    InvoiceItem.id,
+    InvoiceItem.description,
+    as_float(InvoiceItem.quantity).label('quantity'),
+    as_float(InvoiceItem.unit_price).label('unit_price'),
+    as_float(InvoiceItem.total_price).label('total_price'),
+)
+
+def invoice_header_select():
+    return select(*INVOICE_HEADER_COLUMNS).join(Organization, Invoice.organization_id == Organization.id)
+
+def invoice_summary_select():
+    # Doar coloanele afișate în tabel, fără items și fără obiecte ORM
+    return select(
+        Invoice.id,
+        Invoice.organization_id,
+        Organization.name.label('organization_name'),
+        Invoice.invoice_number,
+        Invoice.issue_date,
+        Invoice.due_date,
+        as_float(Invoice.total_amount).label('total_amount'),
+        Invoice.version,
+        Organization.version.label('organization_version')
+    ).join(Organization, Invoice.organization_id == Organization.id)
+
+def invoice_items_select(invoice_ids: List[int]):
+    return (
+        select(*INVOICE_ITEM_COLUMNS)
+        .where(InvoiceItem.invoice_id.in_(invoice_ids))
+        .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+    )
+
+def build_invoice_responses(header_rows: Iterable, item_rows: Iterable) -> List[dict]:
+    items_by_invoice = defaultdict(list)
+    for invoice_id, item_id, description, quantity, unit_price, total_price in item_rows:
+        items_by_invoice[invoice_id].append({
+            'id': item_id,
+            'description': description,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total_price': total_price
+        })
+
+    responses = []
+    for row in header_rows:
+        invoice = row._asdict()
+        invoice['items'] = items_by_invoice.get(row.id, [])
+        responses.append(invoice)
+    return responses
+
+def load_invoice_responses(db, statement) -> List[dict]:
+    header_rows = db.execute(statement).all()
+    if not header_rows:
+        return []
+    item_rows = db.execute(invoice_items_select([row.id for row in header_rows])).all()
+    return build_invoice_responses(header_rows, item_rows)
+
+async def load_invoice_responses_async(db, statement) -> List[dict]:
+    header_rows = (await db.execute(statement)).all()
+    if not header_rows:
+        return []
+    item_rows = (await db.execute(invoice_items_select([row.id for row in header_rows]))).all()
+    return build_invoice_responses(header_rows, item_rows)
@@ -1,15 +1,114 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/invoice.db")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Necesare pentru corectitudine când mai multe procese/fire scriu în același fișier;
+# se aplică întotdeauna, inclusiv cu SQLITE_TUNING=0
+SQLITE_REQUIRED_PRAGMAS = {
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "foreign_keys": "ON",
+}
+
+# Profil de performanță SQLite, aplicat pe fiecare conexiune nouă (SQLITE_TUNING=0 îl dezactivează)
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") != "0"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Valoare negativă = KiB, deci 64 MiB de cache per conexiune
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+    **SQLITE_REQUIRED_PRAGMAS,
+}
+# Opțiune de execuție care alege modul BEGIN pe SQLite; implicit IMMEDIATE
+SQLITE_BEGIN_OPTION = "sqlite_begin"
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: dict):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+# Setări pentru pool-ul de conexiuni la servere (PostgreSQL etc.)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+def create_app_engine(url: str):
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+
+# Drivere async folosite pentru rutele de citire
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def get_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def create_app_async_engine(url: str):
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_url(DATABASE_URL)
+
+engine = create_app_engine(DATABASE_URL)
+async_engine = create_app_async_engine(ASYNC_DATABASE_URL)
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, SQLITE_PRAGMAS if SQLITE_TUNING else SQLITE_REQUIRED_PRAGMAS)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_write_connection(dbapi_connection, connection_record):
+        _set_sqlite_pragmas(dbapi_connection, connection_record)
+        # pysqlite nu mai emite BEGIN singur; îl emitem noi în evenimentul "begin"
+        dbapi_connection.isolation_level = None
+
+    # Tranzacțiile de scriere iau lock-ul de la început și așteaptă busy_timeout; cu BEGIN
+    # implicit (DEFERRED), upgrade-ul la scriere eșuează imediat dacă alt proces a scris între timp
+    @event.listens_for(engine, "begin")
+    def _begin_sqlite_transaction(conn):
+        conn.exec_driver_sql(f"BEGIN {conn.get_execution_options().get(SQLITE_BEGIN_OPTION, 'IMMEDIATE')}")
+
+# Citirile lungi pe engine-ul sync (export) nu trebuie să blocheze scriitorii
+read_engine = engine.execution_options(**{SQLITE_BEGIN_OPTION: "DEFERRED"})
+
+def begin_read_transaction(db):
+    # După commit, răspunsul se citește fără lock de scriere, ca alți scriitori să nu aștepte
+    # până se închide sesiunea (după trimiterea răspunsului)
+    db.connection(execution_options={SQLITE_BEGIN_OPTION: "DEFERRED"})
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -18,4 +117,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,95 @@
+import json
+import os
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+# Listele JSON repetă cheile la fiecare rând; varianta columnară le trimite o singură dată
+COMPACT_MEDIA_TYPE = "application/vnd.invoice.columnar+json"
+COMPACT_ETAG_SUFFIX = "-c"
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+# Stream-urile SSE nu trebuie comprimate: compresorul ar ține evenimentele în buffer
+GZIP_EXCLUDED_PATHS = {"/events"}
+
+def encode_compact(value):
+    # Listă de obiecte -> {"columns": [...], "rows": [[...], ...]}, recursiv pentru items
+    if isinstance(value, list) and value and all(isinstance(entry, dict) for entry in value):
+        columns = list(value[0].keys())
+        if all(entry.keys() == value[0].keys() for entry in value):
+            return {
+                "columns": columns,
+                "rows": [[encode_compact(entry[column]) for column in columns] for entry in value]
+            }
+    if isinstance(value, list):
+        return [encode_compact(entry) for entry in value]
+    return value
+
+def compact_etag(etag: str) -> str:
+    return etag[:-1] + COMPACT_ETAG_SUFFIX + '"' if etag.endswith('"') else etag
+
+def strip_compact_etags(header: str) -> str:
+    return header.replace(COMPACT_ETAG_SUFFIX + '"', '"')
+
+# Recodifică răspunsurile JSON de tip listă când clientul acceptă varianta columnară
+class CompactEncodingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or COMPACT_MEDIA_TYPE not in Headers(scope=scope).get("accept", ""):
+            await self.app(scope, receive, send)
+            return
+
+        # ETag-urile variantei compacte au sufix; ruta le compară fără el
+        headers = MutableHeaders(scope=scope)
+        compact_validator = COMPACT_ETAG_SUFFIX + '"' in headers.get("if-none-match", "")
+        for name in ("if-none-match", "if-match"):
+            if name in headers:
+                headers[name] = strip_compact_etags(headers[name])
+
+        start_message = None
+        body = []
+
+        async def send_compact(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(raw=message["headers"])
+                # 304 confirmă varianta pe care clientul o are deja în cache
+                if message["status"] == 304 and compact_validator and "etag" in response_headers:
+                    response_headers["etag"] = compact_etag(response_headers["etag"])
+                if not response_headers.get("content-type", "").startswith("application/json"):
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            payload = b"".join(body)
+            response_headers = MutableHeaders(raw=start_message["headers"])
+            response_headers.add_vary_header("Accept")
+            decoded = json.loads(payload) if payload else None
+            if isinstance(decoded, list):
+                payload = json.dumps(encode_compact(decoded), separators=(",", ":")).encode()
+                response_headers["content-type"] = COMPACT_MEDIA_TYPE
+                response_headers["content-length"] = str(len(payload))
+                if "etag" in response_headers:
+                    response_headers["etag"] = compact_etag(response_headers["etag"])
+            await send(start_message)
+            await send({"type": "http.response.body", "body": payload})
+
+        await self.app(scope, receive, send_compact)
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = GZIP_MINIMUM_SIZE):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in GZIP_EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
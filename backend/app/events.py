@@ -0,0 +1,109 @@
+import asyncio
+import os
+from typing import Optional, Set
+from sqlalchemy import event, func, insert, select, text
+from .database import SessionLocal, AsyncSessionLocal
+from .models.models import ChangeLog
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+# Intervalul după care verificăm jurnalul chiar fără notificare locală
+# (modificări făcute de alt proces) și trimitem un keepalive
+EVENTS_POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "15"))
+PENDING_CHANGES = "pending_changes"
+SAVEPOINT_MARKS = "pending_changes_savepoints"
+# Cheia lock-ului advisory care serializează scrierile în change_log pe PostgreSQL
+CHANGE_LOG_LOCK_KEY = 7_310_001
+
+class ChangeBroadcaster:
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        self.loop = asyncio.get_running_loop()
+        # O singură notificare în așteptare ajunge; clientul citește oricum tot delta
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def _wake(self):
+        for queue in self.subscribers:
+            if queue.empty():
+                queue.put_nowait(None)
+
+    def publish(self):
+        # Rutele sincrone rulează în threadpool, deci trecem prin bucla de evenimente
+        if self.loop is not None and self.subscribers:
+            self.loop.call_soon_threadsafe(self._wake)
+
+broadcaster = ChangeBroadcaster()
+
+def queue_changes(db, rows: list):
+    # Rândurile pentru change_log se scriu abia la commit, în _write_change_log
+    db.info.setdefault(PENDING_CHANGES, []).extend(rows)
+
+# Pe PostgreSQL id-ul din secvență se alocă la INSERT, nu la commit: fără lock, o tranzacție cu id
+# mai mic poate confirma după una cu id mai mare, iar clientul care a citit-o pe a doua sare peste ea.
+# Jurnalul e ultima scriere din tranzacție, deci cât ține lock-ul nu se mai așteaptă după alte rânduri
+@event.listens_for(SessionLocal, "before_commit")
+def _write_change_log(session):
+    rows = session.info.get(PENDING_CHANGES)
+    if not rows or session.in_nested_transaction():
+        return
+    session.flush()
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK_KEY})
+    session.execute(insert(ChangeLog), rows)
+
+# Anunțăm abonații doar după commit, când modificarea e vizibilă în /changes
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_after_commit(session):
+    if session.in_nested_transaction():
+        return
+    session.info.pop(SAVEPOINT_MARKS, None)
+    if session.info.pop(PENDING_CHANGES, None):
+        broadcaster.publish()
+
+@event.listens_for(SessionLocal, "after_transaction_create")
+def _mark_savepoint(session, transaction):
+    if transaction.nested:
+        marks = session.info.setdefault(SAVEPOINT_MARKS, {})
+        marks[transaction] = len(session.info.get(PENDING_CHANGES, ()))
+
+# Un savepoint anulat renunță doar la modificările înregistrate în interiorul lui
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_after_rollback(session, previous_transaction):
+    if previous_transaction.nested:
+        mark = session.info.get(SAVEPOINT_MARKS, {}).pop(previous_transaction, None)
+        if mark is not None:
+            del session.info.get(PENDING_CHANGES, [])[mark:]
+    elif previous_transaction.parent is None:
+        session.info.pop(PENDING_CHANGES, None)
+        session.info.pop(SAVEPOINT_MARKS, None)
+
+async def latest_change_id() -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.max(ChangeLog.id))) or 0
+
+def format_event(token: int) -> str:
+    return f"id: {token}\nevent: change\ndata: {token}\n\n"
+
+async def stream_changes(request, since: Optional[int]):
+    queue = broadcaster.subscribe()
+    try:
+        token = since if since is not None else await latest_change_id()
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            latest = await latest_change_id()
+            if latest > token:
+                token = latest
+                yield format_event(token)
+            try:
+                await asyncio.wait_for(queue.get(), timeout=EVENTS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -1,9 +1,14 @@
-from fastapi import FastAPI
+import os
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from .migrate import run_migrations
 from .api import routes
+from . import events
+from .encoding import CompactEncodingMiddleware, CompressionMiddleware
 
-app = FastAPI(title="Invoice API")
+app = FastAPI(title="Invoice API", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,13 +16,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[routes.NEXT_CURSOR_HEADER, "ETag"],
 )
+# Ordinea contează: listele sunt întâi recodificate compact, apoi comprimate
+app.add_middleware(CompactEncodingMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
-Base.metadata.create_all(bind=engine)
+# Canal Server-Sent Events: anunță tokenul nou după fiecare modificare,
+# iar clientul își aduce delta prin GET /changes
+@app.get("/events")
+async def change_events(request: Request, since: Optional[str] = None):
+    since = since or request.headers.get("Last-Event-ID")
+    try:
+        since_id = int(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+    return StreamingResponse(
+        events.stream_changes(request, since_id),
+        media_type=events.EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Sub gunicorn migrările rulează o singură dată în master (gunicorn.conf.py), nu în fiecare worker
+if os.getenv("RUN_MIGRATIONS", "1") != "0":
+    run_migrations()
 app.include_router(routes.router)
 
 if __name__ == "__main__":
@@ -0,0 +1,27 @@
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from .database import engine, Base
+from .models import models  # noqa: F401 - înregistrează tabelele în Base.metadata
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "migrations")
+# Revizia care corespunde schemei create anterior cu Base.metadata.create_all
+BASELINE_REVISION = "0001"
+
+def get_alembic_config(connection) -> Config:
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    config.attributes["connection"] = connection
+    config.attributes["target_metadata"] = Base.metadata
+    return config
+
+def run_migrations():
+    with engine.begin() as connection:
+        config = get_alembic_config(connection)
+        tables = inspect(connection).get_table_names()
+
+        # Bazele existente fără istoric de migrări sunt marcate la schema inițială, apoi aduse la zi
+        if "invoices" in tables and "alembic_version" not in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -0,0 +1,39 @@
+from alembic import context
+
+config = context.config
+
+# La pornirea aplicației conexiunea vine din app.migrate; din CLI folosim engine-ul aplicației
+connection = config.attributes.get("connection")
+if connection is None:
+    from app.database import engine
+    from app.models import models  # noqa: F401 - înregistrează tabelele în Base.metadata
+    from app.database import Base
+    target_metadata = Base.metadata
+else:
+    target_metadata = config.attributes["target_metadata"]
+
+
+# Indexul full-text (și tabelele interne FTS5) e creat manual în migrarea 0006, nu din modele
+UNMANAGED_TABLE_PREFIX = "search_index"
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name.startswith(UNMANAGED_TABLE_PREFIX))
+
+
+def run_migrations(conn):
+    context.configure(
+        connection=conn,
+        target_metadata=target_metadata,
+        render_as_batch=conn.dialect.name == "sqlite",
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if connection is not None:
+    run_migrations(connection)
+else:
+    with engine.begin() as conn:
+        run_migrations(conn)
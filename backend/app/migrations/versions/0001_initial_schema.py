@@ -0,0 +1,57 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "organizations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("fiscal_code", sa.String()),
+        sa.Column("address", sa.Text()),
+        sa.Column("created_at", sa.Date()),
+    )
+    op.create_index("ix_organizations_id", "organizations", ["id"])
+
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id")),
+        sa.Column("invoice_number", sa.String(), nullable=False, unique=True),
+        sa.Column("issue_date", sa.Date(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.Date()),
+    )
+    op.create_index("ix_invoices_id", "invoices", ["id"])
+
+    op.create_table(
+        "invoice_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id")),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("quantity", sa.Numeric(10, 2), nullable=False),
+        sa.Column("unit_price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("total_price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("created_at", sa.Date()),
+    )
+    op.create_index("ix_invoice_items_id", "invoice_items", ["id"])
+
+
+def downgrade():
+    op.drop_table("invoice_items")
+    op.drop_table("invoices")
+    op.drop_table("organizations")
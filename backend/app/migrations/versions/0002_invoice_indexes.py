@@ -0,0 +1,33 @@
+"""indexes on foreign keys and invoice dates
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# if_not_exists: bazele create cu create_all pot avea deja indexurile compuse
+INDEXES = [
+    ("ix_invoices_organization_issue_date", "invoices", ["organization_id", "issue_date", "id"]),
+    ("ix_invoices_organization_due_date", "invoices", ["organization_id", "due_date", "id"]),
+    ("ix_invoices_issue_date_id", "invoices", ["issue_date", "id"]),
+    ("ix_invoices_due_date_id", "invoices", ["due_date", "id"]),
+    ("ix_invoices_total_amount_id", "invoices", ["total_amount", "id"]),
+    ("ix_invoice_items_invoice_id", "invoice_items", ["invoice_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,26 @@
+"""version columns for optimistic concurrency
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("organizations", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("invoices", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.drop_column("version")
+    with op.batch_alter_table("organizations") as batch_op:
+        batch_op.drop_column("version")
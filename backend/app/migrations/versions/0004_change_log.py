@@ -0,0 +1,29 @@
+"""change log for incremental client sync
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("change_log")
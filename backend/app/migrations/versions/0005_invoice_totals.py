@@ -0,0 +1,59 @@
+"""per-organization invoice totals for reports
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from collections import defaultdict
+from decimal import Decimal
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    invoice_totals = op.create_table(
+        "invoice_totals",
+        sa.Column("organization_id", sa.Integer(), sa.ForeignKey("organizations.id"), primary_key=True),
+        sa.Column("issue_month", sa.Date(), primary_key=True),
+        sa.Column("due_month", sa.Date(), primary_key=True),
+        sa.Column("invoice_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(14, 2), nullable=False),
+    )
+
+    # Populăm agregatul din facturile existente
+    invoices = sa.table(
+        "invoices",
+        sa.column("organization_id", sa.Integer()),
+        sa.column("issue_date", sa.Date()),
+        sa.column("due_date", sa.Date()),
+        sa.column("total_amount", sa.Numeric(10, 2)),
+    )
+    totals = defaultdict(lambda: [0, Decimal("0")])
+    rows = op.get_bind().execute(sa.select(
+        invoices.c.organization_id, invoices.c.issue_date, invoices.c.due_date, invoices.c.total_amount
+    ).where(invoices.c.organization_id.isnot(None)))
+    for organization_id, issue_date, due_date, total_amount in rows:
+        key = (organization_id, issue_date.replace(day=1), due_date.replace(day=1))
+        totals[key][0] += 1
+        totals[key][1] += total_amount
+    if totals:
+        op.bulk_insert(invoice_totals, [
+            {
+                "organization_id": organization_id,
+                "issue_month": issue_month,
+                "due_month": due_month,
+                "invoice_count": invoice_count,
+                "total_amount": total_amount,
+            }
+            for (organization_id, issue_month, due_month), (invoice_count, total_amount) in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table("invoice_totals")
@@ -0,0 +1,73 @@
+"""full-text search index over invoices and organizations
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# doc_id = entity_id * 2 + 0 pentru organizații, + 1 pentru facturi (vezi app/api/search.py)
+SQLITE_BACKFILL = [
+    """
+    INSERT INTO search_index (rowid, entity, entity_id, title, body)
+    SELECT id * 2, 'organization', id, name,
+           trim(coalesce(fiscal_code, '') || char(10) || coalesce(address, ''), char(10))
+    FROM organizations
+    """,
+    """
+    INSERT INTO search_index (rowid, entity, entity_id, title, body)
+    SELECT id * 2 + 1, 'invoice', id, invoice_number,
+           trim(coalesce(notes, '') || char(10) || coalesce(
+               (SELECT group_concat(description, char(10)) FROM invoice_items
+                WHERE invoice_items.invoice_id = invoices.id), ''), char(10))
+    FROM invoices
+    """,
+]
+
+POSTGRESQL_BACKFILL = [
+    """
+    INSERT INTO search_index (doc_id, entity, entity_id, title, body)
+    SELECT id * 2, 'organization', id, name, concat_ws(chr(10), fiscal_code, address)
+    FROM organizations
+    """,
+    """
+    INSERT INTO search_index (doc_id, entity, entity_id, title, body)
+    SELECT id * 2 + 1, 'invoice', id, invoice_number, concat_ws(chr(10), notes,
+           (SELECT string_agg(description, chr(10) ORDER BY id) FROM invoice_items
+            WHERE invoice_items.invoice_id = invoices.id))
+    FROM invoices
+    """,
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "CREATE TABLE search_index ("
+            "doc_id BIGINT PRIMARY KEY, entity VARCHAR NOT NULL, entity_id INTEGER NOT NULL, "
+            "title TEXT NOT NULL, body TEXT NOT NULL)"
+        )
+        op.execute(
+            "CREATE INDEX ix_search_index_document ON search_index "
+            "USING gin (to_tsvector('simple', title || ' ' || body))"
+        )
+        backfill = POSTGRESQL_BACKFILL
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "entity UNINDEXED, entity_id UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        backfill = SQLITE_BACKFILL
+    for statement in backfill:
+        op.execute(statement)
+
+
+def downgrade():
+    op.execute("DROP TABLE search_index")
@@ -0,0 +1,71 @@
+"""organization name in invoice search documents
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Documentele facturilor se reconstruiesc cu denumirea organizației la începutul corpului
+# (vezi invoice_documents din app/api/search.py); downgrade revine la corpul din 0006
+DELETE_INVOICE_DOCUMENTS = "DELETE FROM search_index WHERE entity = 'invoice'"
+
+SQLITE_INVOICE_DOCUMENTS = {
+    "upgrade": """
+    INSERT INTO search_index (rowid, entity, entity_id, title, body)
+    SELECT invoices.id * 2 + 1, 'invoice', invoices.id, invoice_number,
+           rtrim(coalesce(organizations.name || char(10), '') || coalesce(notes || char(10), '') || coalesce(
+               (SELECT group_concat(description, char(10)) FROM invoice_items
+                WHERE invoice_items.invoice_id = invoices.id), ''), char(10))
+    FROM invoices LEFT JOIN organizations ON organizations.id = invoices.organization_id
+    """,
+    "downgrade": """
+    INSERT INTO search_index (rowid, entity, entity_id, title, body)
+    SELECT id * 2 + 1, 'invoice', id, invoice_number,
+           trim(coalesce(notes, '') || char(10) || coalesce(
+               (SELECT group_concat(description, char(10)) FROM invoice_items
+                WHERE invoice_items.invoice_id = invoices.id), ''), char(10))
+    FROM invoices
+    """,
+}
+
+POSTGRESQL_INVOICE_DOCUMENTS = {
+    "upgrade": """
+    INSERT INTO search_index (doc_id, entity, entity_id, title, body)
+    SELECT invoices.id * 2 + 1, 'invoice', invoices.id, invoice_number,
+           concat_ws(chr(10), organizations.name, notes,
+               (SELECT string_agg(description, chr(10) ORDER BY id) FROM invoice_items
+                WHERE invoice_items.invoice_id = invoices.id))
+    FROM invoices LEFT JOIN organizations ON organizations.id = invoices.organization_id
+    """,
+    "downgrade": """
+    INSERT INTO search_index (doc_id, entity, entity_id, title, body)
+    SELECT id * 2 + 1, 'invoice', id, invoice_number, concat_ws(chr(10), notes,
+           (SELECT string_agg(description, chr(10) ORDER BY id) FROM invoice_items
+            WHERE invoice_items.invoice_id = invoices.id))
+    FROM invoices
+    """,
+}
+
+
+def rebuild_invoice_documents(direction):
+    if op.get_bind().dialect.name == "postgresql":
+        statements = POSTGRESQL_INVOICE_DOCUMENTS
+    else:
+        statements = SQLITE_INVOICE_DOCUMENTS
+    op.execute(DELETE_INVOICE_DOCUMENTS)
+    op.execute(statements[direction])
+
+
+def upgrade():
+    rebuild_invoice_documents("upgrade")
+
+
+def downgrade():
+    rebuild_invoice_documents("downgrade")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Numeric, Date, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
@@ -11,11 +11,24 @@ class Organization(Base):
     fiscal_code = Column(String)
     address = Column(Text)
     created_at = Column(Date, default=datetime.utcnow)
+    # Crește la fiecare modificare; expus ca ETag pentru cereri condiționate
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # UPDATE/DELETE din ORM includ WHERE version = valoarea citită; incrementul rămâne manual
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
     invoices = relationship("Invoice", back_populates="organization", cascade="all, delete-orphan")
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    # Indexuri compuse pentru filtrele și sortările din GET /invoices/ (id e cheia secundară a cursorului)
+    __table_args__ = (
+        Index("ix_invoices_organization_issue_date", "organization_id", "issue_date", "id"),
+        Index("ix_invoices_organization_due_date", "organization_id", "due_date", "id"),
+        Index("ix_invoices_issue_date_id", "issue_date", "id"),
+        Index("ix_invoices_due_date_id", "due_date", "id"),
+        Index("ix_invoices_total_amount_id", "total_amount", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -25,6 +38,9 @@ class Invoice(Base):
     total_amount = Column(Numeric(10, 2), nullable=False)
     notes = Column(Text)
     created_at = Column(Date, default=datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
     organization = relationship("Organization", back_populates="invoices")
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
@@ -33,11 +49,33 @@ class InvoiceItem(Base):
     __tablename__ = "invoice_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"))
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), index=True)
     description = Column(Text, nullable=False)
     quantity = Column(Numeric(10, 2), nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
     total_price = Column(Numeric(10, 2), nullable=False)
     created_at = Column(Date, default=datetime.utcnow)
 
-    invoice = relationship("Invoice", back_populates="items") 
\ No newline at end of file
+    invoice = relationship("Invoice", back_populates="items")
+
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    # id crește monoton și servește drept token pentru GET /changes; ordinea id-urilor urmează
+    # ordinea commit-urilor (vezi record_changes)
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class InvoiceTotal(Base):
+    __tablename__ = "invoice_totals"
+
+    # Agregat întreținut în aceeași tranzacție cu facturile; rapoartele citesc de aici.
+    # Luna scadenței permite calculul restanțelor fără a parcurge facturile
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    issue_month = Column(Date, primary_key=True)
+    due_month = Column(Date, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Numeric(14, 2), nullable=False, default=0)
@@ -0,0 +1,122 @@
+"""Latență p50/p99 pentru GET /invoices/summary: ruta async față de varianta sync din threadpool.
+
+Rulare din directorul backend/:  python benchmarks/async_latency.py [--requests 2000] [--concurrency 64]
+Necesită httpx (pip install httpx).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+
+import httpx
+import uvicorn
+from fastapi import Depends
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.main import app
+from app.database import SessionLocal, get_db
+from app.models.models import Organization, Invoice
+
+SEED_INVOICES = 5000
+
+
+@app.get("/bench/sync/invoices/summary")
+def sync_invoice_summaries(limit: int = 100, db: Session = Depends(get_db)):
+    # Aceeași interogare ca /invoices/summary, dar cu Session sync (modelul vechi, threadpool)
+    rows = db.execute(
+        select(
+            Invoice.id,
+            Invoice.organization_id,
+            Organization.name.label('organization_name'),
+            Invoice.invoice_number,
+            Invoice.issue_date,
+            Invoice.due_date,
+            Invoice.total_amount
+        )
+        .join(Organization, Invoice.organization_id == Organization.id)
+        .order_by(Invoice.issue_date, Invoice.id)
+        .limit(limit)
+    ).all()
+    return [{**row._asdict(), 'total_amount': float(row.total_amount)} for row in rows]
+
+
+def seed():
+    from datetime import date
+    from decimal import Decimal
+    with SessionLocal() as db:
+        db.execute(insert(Organization), {"name": "Bench"})
+        db.execute(insert(Invoice), [{
+            "organization_id": 1,
+            "invoice_number": f"B-{i}",
+            "issue_date": date(2024, 1 + i % 12, 1),
+            "due_date": date(2024, 1 + i % 12, 28),
+            "total_amount": Decimal("100.00"),
+        } for i in range(SEED_INVOICES)])
+        db.commit()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def measure(base_url, path, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await one()
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{path:<36} req/s={total / elapsed:>8.1f}  "
+          f"p50={statistics.median(latencies) * 1000:>7.1f}ms  p99={p99 * 1000:>7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    seed()
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {SEED_INVOICES} invoices")
+    asyncio.run(measure(base_url, "/bench/sync/invoices/summary?limit=100", args.requests, args.concurrency))
+    asyncio.run(measure(base_url, "/invoices/summary?limit=100", args.requests, args.concurrency))
+
+    server.should_exit = True
+    thread.join()
+
+
+if __name__ == "__main__":
+    main()
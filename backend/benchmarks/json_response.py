@@ -0,0 +1,84 @@
+"""Throughput GET /invoices/?limit=1000: JSONResponse + validare response_model față de orjson pe rânduri pre-validate.
+
+Rulare din directorul backend/:  python benchmarks/json_response.py [--invoices 1000] [--items 5] [--requests 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.main import app
+from app.database import engine, get_async_db
+from app.api.routes import InvoiceResponse
+from app.api.serializers import invoice_header_select, load_invoice_responses_async
+from app.models.models import Organization, Invoice, InvoiceItem
+
+
+@app.get("/bench/validated/invoices", response_model=List[InvoiceResponse], response_class=JSONResponse)
+async def validated_invoices(limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    # Calea veche: aceleași rânduri, validate prin response_model și codificate cu json din stdlib
+    return await load_invoice_responses_async(db, invoice_header_select().order_by(Invoice.id).limit(limit))
+
+
+def seed(invoices, items):
+    with engine.begin() as conn:
+        conn.execute(insert(Organization), {"name": "Bench"})
+        conn.execute(insert(Invoice), [{
+            "organization_id": 1,
+            "invoice_number": f"B-{i}",
+            "issue_date": date(2024, 1, 1),
+            "due_date": date(2024, 2, 1),
+            "total_amount": Decimal("50.00"),
+        } for i in range(invoices)])
+        conn.execute(insert(InvoiceItem), [{
+            "invoice_id": i + 1,
+            "description": f"item {n}",
+            "quantity": Decimal("2"),
+            "unit_price": Decimal("5"),
+            "total_price": Decimal("10"),
+        } for i in range(invoices) for n in range(items)])
+
+
+def throughput(client, url, requests):
+    client.get(url)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+    return requests / (time.perf_counter() - start), response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    seed(args.invoices, args.items)
+    client = TestClient(app)
+    before, before_body = throughput(client, f"/bench/validated/invoices?limit={args.invoices}", args.requests)
+    after, after_body = throughput(client, f"/invoices/?sort=id&limit={args.invoices}", args.requests)
+    assert before_body == after_body
+
+    print(f"GET /invoices/?limit={args.invoices} ({args.items} items each), {args.requests} requests")
+    print(f"validated + JSONResponse  {before:>7.1f} req/s")
+    print(f"prevalidated + orjson     {after:>7.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Dimensiunea răspunsului GET /invoices/ și timpul de decodare în client: JSON față de columnar, cu și fără gzip.
+
+Rulare din directorul backend/:  python benchmarks/payload_encoding.py [--invoices 10000] [--items 3] [--repeat 5]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'bench.db')}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from app.main import app
+from app.database import engine
+from app.encoding import COMPACT_MEDIA_TYPE
+from app.models.models import Organization, Invoice, InvoiceItem
+from frontend.src.api.client import decode_compact
+
+
+def seed(invoices, items):
+    with engine.begin() as conn:
+        conn.execute(insert(Organization), {"name": "Bench"})
+        conn.execute(insert(Invoice), [{
+            "organization_id": 1,
+            "invoice_number": f"B-{i}",
+            "issue_date": date(2024, 1, 1),
+            "due_date": date(2024, 2, 1),
+            "total_amount": Decimal("50.00"),
+            "notes": "monthly services",
+        } for i in range(invoices)])
+        conn.execute(insert(InvoiceItem), [{
+            "invoice_id": i + 1,
+            "description": f"item {n}",
+            "quantity": Decimal("2"),
+            "unit_price": Decimal("5"),
+            "total_price": Decimal("10"),
+        } for i in range(invoices) for n in range(items)])
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=10000)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(args.invoices, args.items)
+    client = TestClient(app)
+    url = f"/invoices/?limit={args.invoices}"
+    plain = client.get(url, headers={"Accept-Encoding": "identity"}).content
+    compact = client.get(url, headers={"Accept": COMPACT_MEDIA_TYPE, "Accept-Encoding": "identity"}).content
+    # Același nivel de compresie ca GZipMiddleware
+    plain_gz = gzip.compress(plain, compresslevel=9)
+    compact_gz = gzip.compress(compact, compresslevel=9)
+
+    variants = [
+        ("json", plain, lambda: json.loads(plain)),
+        ("json+gzip", plain_gz, lambda: json.loads(gzip.decompress(plain_gz))),
+        ("columnar", compact, lambda: decode_compact(json.loads(compact))),
+        ("columnar+gzip", compact_gz, lambda: decode_compact(json.loads(gzip.decompress(compact_gz)))),
+    ]
+    expected = json.loads(plain)
+    print(f"{args.invoices} invoices x {args.items} items, decode best of {args.repeat}")
+    for name, payload, decode in variants:
+        elapsed, result = best_of(decode, args.repeat)
+        assert result == expected
+        print(f"{name:<14} {len(payload) / 1024:>9.1f} KiB  decode {elapsed * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
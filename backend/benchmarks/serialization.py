@@ -0,0 +1,106 @@
+"""Cost de serializare per 1000 de facturi: dict-uri construite din obiecte ORM față de rânduri Core.
+
+Rulare din directorul backend/:  python benchmarks/serialization.py [--invoices 1000] [--items 5] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from app.database import Base
+from app.models.models import Organization, Invoice, InvoiceItem
+from app.api.serializers import invoice_header_select, load_invoice_responses
+
+
+def seed(engine, invoices, items):
+    with engine.begin() as conn:
+        conn.execute(insert(Organization), {"name": "Bench"})
+        conn.execute(insert(Invoice), [{
+            "organization_id": 1,
+            "invoice_number": f"B-{i}",
+            "issue_date": date(2024, 1, 1),
+            "due_date": date(2024, 2, 1),
+            "total_amount": Decimal("50.00"),
+        } for i in range(invoices)])
+        conn.execute(insert(InvoiceItem), [{
+            "invoice_id": i + 1,
+            "description": f"item {n}",
+            "quantity": Decimal("2"),
+            "unit_price": Decimal("5"),
+            "total_price": Decimal("10"),
+        } for i in range(invoices) for n in range(items)])
+
+
+def orm_dicts(db):
+    # Calea veche: obiecte ORM + dict construit manual cu float() pe fiecare câmp
+    invoices = db.scalars(
+        select(Invoice)
+        .join(Invoice.organization)
+        .options(contains_eager(Invoice.organization), selectinload(Invoice.items))
+        .order_by(Invoice.id)
+    ).all()
+    return [{
+        'id': invoice.id,
+        'organization_id': invoice.organization_id,
+        'organization_name': invoice.organization.name,
+        'invoice_number': invoice.invoice_number,
+        'issue_date': invoice.issue_date,
+        'due_date': invoice.due_date,
+        'total_amount': float(invoice.total_amount),
+        'notes': invoice.notes,
+        'created_at': invoice.created_at,
+        'version': invoice.version,
+        'organization_version': invoice.organization.version,
+        'items': [{
+            'id': item.id,
+            'description': item.description,
+            'quantity': float(item.quantity),
+            'unit_price': float(item.unit_price),
+            'total_price': float(item.total_price)
+        } for item in invoice.items]
+    } for invoice in invoices]
+
+
+def core_rows(db):
+    return load_invoice_responses(db, invoice_header_select().order_by(Invoice.id))
+
+
+def timed(engine, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            result = fn(db)
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    seed(engine, args.invoices, args.items)
+
+    per_1k = 1000 / args.invoices
+    orm_time, orm_result = timed(engine, orm_dicts, args.repeat)
+    core_time, core_result = timed(engine, core_rows, args.repeat)
+    assert orm_result == core_result
+
+    print(f"{args.invoices} invoices x {args.items} items, best of {args.repeat}")
+    print(f"orm dicts   {orm_time * per_1k * 1000:>8.1f} ms / 1k invoices")
+    print(f"core rows   {core_time * per_1k * 1000:>8.1f} ms / 1k invoices")
+
+
+if __name__ == "__main__":
+    main()
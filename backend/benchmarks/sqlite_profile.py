@@ -0,0 +1,117 @@
+"""Debit citire/scriere SQLite sub încărcare concurentă, cu și fără profilul din app.database.
+
+Rulare din directorul backend/:  python benchmarks/sqlite_profile.py [--seconds 5] [--readers 4] [--writers 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+from app.database import Base, SQLITE_PRAGMAS, apply_sqlite_pragmas
+from app.models.models import Organization, Invoice, InvoiceItem
+
+SEED_INVOICES = 2000
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if pragmas:
+        event.listen(engine, "connect", lambda conn, record: apply_sqlite_pragmas(conn, pragmas))
+    return engine
+
+
+def insert_invoice(conn, number):
+    invoice_id = conn.execute(insert(Invoice).returning(Invoice.id), {
+        "organization_id": 1,
+        "invoice_number": number,
+        "issue_date": date(2024, 1, 1),
+        "due_date": date(2024, 2, 1),
+        "total_amount": Decimal("30.00"),
+    }).scalar_one()
+    conn.execute(insert(InvoiceItem), [{
+        "invoice_id": invoice_id,
+        "description": "item",
+        "quantity": Decimal("1"),
+        "unit_price": Decimal("10"),
+        "total_price": Decimal("10"),
+    }] * 3)
+
+
+def run_profile(name, pragmas, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), pragmas)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Organization), {"name": "Bench"})
+            for i in range(SEED_INVOICES):
+                insert_invoice(conn, f"SEED-{i}")
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+        stop = time.perf_counter() + args.seconds
+        query = (
+            select(Invoice.id, Invoice.invoice_number, Invoice.total_amount, Organization.name)
+            .join(Organization)
+            .order_by(Invoice.issue_date.desc(), Invoice.id.desc())
+            .limit(100)
+        )
+
+        def reader():
+            while time.perf_counter() < stop:
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(query).all()
+                    key = "reads"
+                except OperationalError:
+                    key = "errors"
+                with lock:
+                    counts[key] += 1
+
+        def writer(worker):
+            n = 0
+            while time.perf_counter() < stop:
+                try:
+                    with engine.begin() as conn:
+                        insert_invoice(conn, f"W{worker}-{n}")
+                    key = "writes"
+                except OperationalError:
+                    key = "errors"
+                n += 1
+                with lock:
+                    counts[key] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer, args=(w,)) for w in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"{name:<8} reads/s={counts['reads'] / args.seconds:>9.1f}  "
+          f"writes/s={counts['writes'] / args.seconds:>8.1f}  errors={counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds}s per profile")
+    # default = setările implicite ale SQLite (journal DELETE, synchronous FULL)
+    run_profile("default", {}, args)
+    run_profile("tuned", SQLITE_PRAGMAS, args)
+
+
+if __name__ == "__main__":
+    main()
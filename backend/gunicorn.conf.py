@@ -0,0 +1,46 @@
+# Profil de producție: gunicorn ca manager de procese, uvicorn (uvloop + httptools) în fiecare worker.
+# Rulare din directorul backend/:  gunicorn -c gunicorn.conf.py app.main:app
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Conexiuni și coadă de accept
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+backlog = int(os.getenv("BACKLOG", "2048"))
+
+# Oprire grațioasă: cererile în curs au GRACEFUL_TIMEOUT secunde să se termine
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+
+# Reciclăm periodic workerii, decalat, ca să nu repornească toți odată
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Fiecare worker are propriul broadcaster SSE; modificările făcute în alt worker
+# ajung la clienți prin verificarea periodică a jurnalului de modificări
+if workers > 1:
+    os.environ.setdefault("EVENTS_POLL_INTERVAL", "2")
+
+
+def on_starting(server):
+    # Migrările rulează o singură dată, în master, înainte de fork; workerii nu le mai rulează
+    from app.database import engine
+    from app.migrate import run_migrations
+
+    run_migrations()
+    engine.dispose()
+    os.environ["RUN_MIGRATIONS"] = "0"
+
+
+def post_fork(server, worker):
+    # Conexiunile moștenite din master nu se folosesc în worker; pool-ul pornește gol
+    from app.database import engine
+
+    engine.dispose(close=False)
@@ -0,0 +1,103 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Engine-urile aplicației se creează la import, deci baza de test se alege înainte de orice import din app
+TEST_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+sys.path.insert(0, BACKEND_DIR)
+
+# PostgreSQL rulează doar cu TEST_POSTGRES_URL setat; baza indicată e de unică folosință,
+# schema ei se șterge la pornirea testelor
+POSTGRES_URL_ENV = "TEST_POSTGRES_URL"
+SERVER_START_TIMEOUT = 30
+BACKENDS = ["sqlite", "postgresql"]
+# Migrările se testează pe o bază goală separată, nu pe cea folosită de serverul de test
+MIGRATION_SCHEMA = "migration_test"
+
+def postgres_url() -> str:
+    url = os.getenv(POSTGRES_URL_ENV)
+    if not url:
+        pytest.skip(f"{POSTGRES_URL_ENV} is not set")
+    return url
+
+def reset_postgres(url: str, schema: str = "public"):
+    engine = create_engine(url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL unavailable: {e}")
+    finally:
+        engine.dispose()
+
+def backend_database_url(backend: str, tmp_path_factory) -> str:
+    if backend == "sqlite":
+        return f"sqlite:///{tmp_path_factory.mktemp('sqlite') / 'invoice.db'}"
+    url = postgres_url()
+    reset_postgres(url)
+    return url
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_healthy(client: httpx.Client, process, log_path: str):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            if client.get("/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    with open(log_path) as log:
+        pytest.fail(f"API server did not start:\n{log.read()}")
+
+# Serverul pornește într-un proces separat pentru fiecare bază: engine-urile și migrările
+# depind de DATABASE_URL la import, exact ca în producție
+@pytest.fixture(scope="session", params=BACKENDS)
+def api(request, tmp_path_factory):
+    database_url = backend_database_url(request.param, tmp_path_factory)
+    port = free_port()
+    log_path = str(tmp_path_factory.mktemp("logs") / f"{request.param}.log")
+    env = {**os.environ, "DATABASE_URL": database_url, "RUN_MIGRATIONS": "1"}
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30)
+    try:
+        wait_until_healthy(client, process, log_path)
+        yield client
+    finally:
+        client.close()
+        process.terminate()
+        process.wait(10)
+
+@pytest.fixture(params=BACKENDS)
+def empty_engine(request, tmp_path_factory):
+    if request.param == "sqlite":
+        engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('migrations') / 'invoice.db'}")
+    else:
+        url = postgres_url()
+        reset_postgres(url, MIGRATION_SCHEMA)
+        engine = create_engine(url, connect_args={"options": f"-csearch_path={MIGRATION_SCHEMA}"})
+    yield engine
+    engine.dispose()
@@ -0,0 +1,213 @@
+"""Migrări, CRUD, căutare, rapoarte și import în bloc, rulate pe SQLite și pe PostgreSQL."""
+import json
+import uuid
+from datetime import date
+from alembic import command
+from sqlalchemy import insert, select, func, text
+from app.migrate import get_alembic_config
+from app.database import Base
+from app.models.models import Organization, Invoice, InvoiceItem
+
+def unique(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+def create_organization(api, name=None, **fields):
+    response = api.post("/organizations/", json={"name": name or unique("Org"), **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def invoice_payload(organization_id, number=None, issue_date="2024-03-05", due_date="2024-04-05", items=None):
+    return {
+        "organization_id": organization_id,
+        "invoice_number": number or unique("INV"),
+        "issue_date": issue_date,
+        "due_date": due_date,
+        "items": items if items is not None else [
+            {"description": "Consultanță", "quantity": 2, "unit_price": 10.5},
+        ],
+    }
+
+def create_invoice(api, organization_id, **fields):
+    response = api.post("/invoices/", json=invoice_payload(organization_id, **fields))
+    assert response.status_code == 200, response.text
+    return response.json(), response.headers["ETag"]
+
+def test_migrations_backfill_search_index(empty_engine):
+    with empty_engine.begin() as conn:
+        config = get_alembic_config(conn)
+        config.attributes["target_metadata"] = Base.metadata
+        command.upgrade(config, "0005")
+        org_id = conn.execute(
+            insert(Organization).returning(Organization.id),
+            {"name": "Backfill SRL", "fiscal_code": "RO123", "address": "Chișinău"}
+        ).scalar_one()
+        invoice_id = conn.execute(insert(Invoice).returning(Invoice.id), {
+            "organization_id": org_id, "invoice_number": "BF-1", "issue_date": date(2024, 1, 1),
+            "due_date": date(2024, 2, 1), "total_amount": 10, "notes": "livrare",
+        }).scalar_one()
+        conn.execute(insert(InvoiceItem), {
+            "invoice_id": invoice_id, "description": "Cabluri", "quantity": 1, "unit_price": 10, "total_price": 10,
+        })
+
+        command.upgrade(config, "head")
+
+        documents = conn.execute(text("SELECT entity, entity_id, title, body FROM search_index ORDER BY entity")).all()
+        assert [tuple(row) for row in documents] == [
+            ("invoice", invoice_id, "BF-1", "Backfill SRL\nlivrare\nCabluri"),
+            ("organization", org_id, "Backfill SRL", "RO123\nChișinău"),
+        ]
+        assert conn.scalar(text("SELECT version_num FROM alembic_version")) == "0007"
+
+        command.downgrade(config, "0006")
+        assert conn.scalar(text("SELECT body FROM search_index WHERE entity = 'invoice'")) == "livrare\nCabluri"
+        command.downgrade(config, "base")
+        assert conn.scalar(select(func.count()).select_from(text("alembic_version"))) == 0
+
+def test_organization_crud(api):
+    org = create_organization(api, fiscal_code="RO1")
+    response = api.get(f"/organizations/{org['id']}")
+    etag = response.headers["ETag"]
+    assert api.get(f"/organizations/{org['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    updated = api.put(f"/organizations/{org['id']}", json={"name": org["name"], "address": "Str. Nouă 1"},
+                      headers={"If-Match": etag})
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["version"] == org["version"] + 1
+    assert updated.json()["address"] == "Str. Nouă 1"
+
+    stale = api.put(f"/organizations/{org['id']}", json={"name": "Altă denumire"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert api.delete(f"/organizations/{org['id']}", headers={"If-Match": etag}).status_code == 412
+
+    deleted = api.delete(f"/organizations/{org['id']}", headers={"If-Match": updated.headers["ETag"]})
+    assert deleted.status_code == 200
+    assert api.get(f"/organizations/{org['id']}").status_code == 404
+
+def test_invoice_crud(api):
+    org = create_organization(api)
+    invoice, etag = create_invoice(api, org["id"])
+    assert invoice["total_amount"] == 21.0
+    assert [item["total_price"] for item in invoice["items"]] == [21.0]
+
+    # Răspunsurile pre-validate trebuie să păstreze tipurile: 21.0, nu 21
+    fetched = api.get(f"/invoices/{invoice['id']}")
+    assert fetched.json() == invoice
+    assert isinstance(fetched.json()["total_amount"], float)
+    assert all(isinstance(item[key], float) for item in fetched.json()["items"]
+               for key in ("quantity", "unit_price", "total_price"))
+    listed = api.get("/invoices/", params={"organization_id": org["id"]}).json()
+    assert isinstance(listed[0]["total_amount"], float)
+
+    payload = invoice_payload(org["id"], number=invoice["invoice_number"], items=[
+        {"id": invoice["items"][0]["id"], "description": "Consultanță", "quantity": 3, "unit_price": 10.5},
+        {"description": "Deplasare", "quantity": 1, "unit_price": 4},
+    ])
+    updated = api.put(f"/invoices/{invoice['id']}", json=payload, headers={"If-Match": etag})
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["total_amount"] == 35.5
+    assert len(updated.json()["items"]) == 2
+    assert api.put(f"/invoices/{invoice['id']}", json=payload, headers={"If-Match": etag}).status_code == 412
+
+    patched = api.patch(f"/invoices/{invoice['id']}", json={"notes": "plătită parțial"},
+                        headers={"If-Match": updated.headers["ETag"]})
+    assert patched.status_code == 200, patched.text
+    assert patched.json()["notes"] == "plătită parțial"
+    assert patched.json()["total_amount"] == 35.5
+
+    listed = api.get("/invoices/summary", params={"organization_id": org["id"]}).json()
+    assert [row["id"] for row in listed] == [invoice["id"]]
+    assert isinstance(listed[0]["total_amount"], float)
+
+    duplicate = api.post("/invoices/", json=invoice_payload(org["id"], number=invoice["invoice_number"]))
+    assert duplicate.status_code >= 400
+
+    deleted = api.delete(f"/invoices/{invoice['id']}", headers={"If-Match": patched.headers["ETag"]})
+    assert deleted.status_code == 200
+    assert api.get(f"/invoices/{invoice['id']}").status_code == 404
+
+def test_search(api):
+    word = uuid.uuid4().hex[:6]
+    org = create_organization(api, name=f"Zephyr{word} Consulting", address="Bd. Ștefan cel Mare")
+    invoice, _ = create_invoice(api, org["id"], items=[
+        {"description": f"Mentenanță servere{word}", "quantity": 1, "unit_price": 100},
+    ])
+
+    results = api.get("/search", params={"q": f"zephyr{word[:3]}"}).json()
+    assert {(result["entity"], result["id"]) for result in results} == {
+        ("organization", org["id"]), ("invoice", invoice["id"]),
+    }
+
+    results = api.get("/search", params={"q": f"servere{word}", "entity": "invoice"}).json()
+    assert [(result["entity"], result["id"]) for result in results] == [("invoice", invoice["id"])]
+    assert "[" in results[0]["snippet"]
+
+    assert api.get("/search", params={"q": f"servere{word}", "entity": "organization"}).json() == []
+
+    # Factura se găsește după denumirea curentă a organizației
+    etag = api.get(f"/organizations/{org['id']}").headers["ETag"]
+    renamed = api.put(f"/organizations/{org['id']}", json={"name": f"Boreas{word} Consulting"},
+                      headers={"If-Match": etag})
+    assert renamed.status_code == 200, renamed.text
+    results = api.get("/search", params={"q": f"boreas{word}", "entity": "invoice"}).json()
+    assert [result["id"] for result in results] == [invoice["id"]]
+    assert api.get("/search", params={"q": f"zephyr{word}", "entity": "invoice"}).json() == []
+    assert api.get("/search", params={"q": "&|!"}).json() == []
+
+def test_reports(api):
+    org = create_organization(api)
+    create_invoice(api, org["id"], issue_date="2024-01-10", due_date="2024-02-10")
+    create_invoice(api, org["id"], issue_date="2024-01-20", due_date="2024-02-20")
+    invoice, etag = create_invoice(api, org["id"], issue_date="2024-03-01", due_date="2099-01-01")
+
+    periods = api.get("/reports/periods", params={"organization_id": org["id"]}).json()
+    assert [(row["period"], row["invoice_count"], row["total_amount"]) for row in periods] == [
+        ("2024-01", 2, 42.0), ("2024-03", 1, 21.0),
+    ]
+
+    report = {row["organization_id"]: row for row in api.get("/reports/organizations").json()}[org["id"]]
+    assert (report["invoice_count"], report["total_amount"]) == (3, 63.0)
+    assert (report["overdue_count"], report["overdue_amount"]) == (2, 42.0)
+    assert all(isinstance(row["total_amount"], float) for row in periods)
+    assert isinstance(report["total_amount"], float) and isinstance(report["overdue_amount"], float)
+
+    api.delete(f"/invoices/{invoice['id']}", headers={"If-Match": etag})
+    periods = api.get("/reports/periods", params={"organization_id": org["id"]}).json()
+    assert [(row["period"], row["invoice_count"]) for row in periods] == [("2024-01", 2)]
+
+def test_bulk_import(api):
+    org = create_organization(api)
+    taken, _ = create_invoice(api, org["id"])
+    rows = [
+        invoice_payload(org["id"]),
+        invoice_payload(org["id"], number=taken["invoice_number"]),
+        invoice_payload(999999),
+        {"organization_id": org["id"]},
+        invoice_payload(org["id"]),
+    ]
+
+    result = api.post("/invoices/bulk", json=rows).json()
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+
+    ndjson = "\n".join(json.dumps(invoice_payload(org["id"])) for _ in range(3))
+    result = api.post("/invoices/bulk", content=ndjson,
+                      headers={"Content-Type": "application/x-ndjson"}).json()
+    assert (result["created"], result["failed"]) == (3, 0)
+
+    listed = api.get("/invoices/summary", params={"organization_id": org["id"]}).json()
+    assert len(listed) == 6
+    report = {row["organization_id"]: row for row in api.get("/reports/organizations").json()}[org["id"]]
+    assert report["invoice_count"] == 6
+
+def test_change_feed(api):
+    token = api.get("/changes").json()["next_token"]
+    org = create_organization(api)
+    invoice, etag = create_invoice(api, org["id"])
+
+    feed = api.get("/changes", params={"since": token}).json()
+    assert [row["id"] for row in feed["organizations"]] == [org["id"]]
+    assert [row["id"] for row in feed["invoices"]] == [invoice["id"]]
+
+    api.delete(f"/invoices/{invoice['id']}", headers={"If-Match": etag})
+    feed = api.get("/changes", params={"since": feed["next_token"]}).json()
+    assert feed["deleted_invoices"] == [invoice["id"]]
@@ -0,0 +1,51 @@
+"""Importul în bloc raportează doar rândurile care eșuează în baza de date, nu tot chunk-ul."""
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import routes
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+def invoice_row(organization_id, number):
+    return {
+        "organization_id": organization_id,
+        "invoice_number": number,
+        "issue_date": "2024-03-01",
+        "due_date": "2024-04-01",
+        "items": [{"description": "Servicii", "quantity": 2, "unit_price": 10.5}],
+    }
+
+def test_failed_row_does_not_fail_the_chunk(client, monkeypatch):
+    organization_id = client.post("/organizations/", json={"name": "Bulk savepoint"}).json()["id"]
+    write_invoice_rows = routes.write_invoice_rows
+
+    def failing_write(db, rows):
+        # Rândul stricat apucă să scrie (inclusiv în jurnalul de modificări) înainte de eroare
+        write_invoice_rows(db, rows)
+        if any(invoice_row["invoice_number"] == "BULK-BAD" for _, invoice_row, _ in rows):
+            raise RuntimeError("simulated constraint failure")
+
+    monkeypatch.setattr(routes, "write_invoice_rows", failing_write)
+    token = client.get("/changes").json()["next_token"]
+    response = client.post("/invoices/bulk", json=[
+        invoice_row(organization_id, "BULK-OK-1"),
+        invoice_row(organization_id, "BULK-BAD"),
+        invoice_row(organization_id, "BULK-OK-2"),
+    ])
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1]
+    assert "simulated constraint failure" in result["errors"][0]["detail"]
+
+    numbers = {invoice["invoice_number"] for invoice in
+               client.get("/invoices/", params={"organization_id": organization_id}).json()}
+    assert numbers == {"BULK-OK-1", "BULK-OK-2"}
+    feed = client.get("/changes", params={"since": token}).json()
+    assert {invoice["invoice_number"] for invoice in feed["invoices"]} == numbers
+    assert feed["deleted_invoices"] == []
+    summary = client.get("/reports/organizations").json()
+    assert any(row["organization_id"] == organization_id and row["invoice_count"] == 2 for row in summary)
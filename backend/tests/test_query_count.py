@@ -0,0 +1,62 @@
+"""Numărul de interogări pentru listele de facturi nu depinde de mărimea paginii (fără N+1)."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from app.main import app
+from app.database import engine, async_engine
+from app.models.models import Organization, Invoice, InvoiceItem
+
+ORGANIZATIONS = 5
+INVOICES = 60
+ITEMS_PER_INVOICE = 3
+
+@pytest.fixture(scope="module")
+def client():
+    with engine.begin() as conn:
+        org_ids = conn.execute(
+            insert(Organization).returning(Organization.id),
+            [{"name": f"Query count {i}"} for i in range(ORGANIZATIONS)]
+        ).scalars().all()
+        invoice_ids = conn.execute(insert(Invoice).returning(Invoice.id), [{
+            "organization_id": org_ids[i % ORGANIZATIONS],
+            "invoice_number": f"QC-{i}",
+            "issue_date": date(2024, 1, 1 + i % 28),
+            "due_date": date(2024, 2, 1),
+            "total_amount": Decimal("30.00"),
+        } for i in range(INVOICES)]).scalars().all()
+        conn.execute(insert(InvoiceItem), [{
+            "invoice_id": invoice_id,
+            "description": f"item {n}",
+            "quantity": Decimal("2"),
+            "unit_price": Decimal("5"),
+            "total_price": Decimal("10"),
+        } for invoice_id in invoice_ids for n in range(ITEMS_PER_INVOICE)])
+    return TestClient(app)
+
+def count_queries(client, url):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Rutele de citire folosesc engine-ul async; îl ascultăm și pe cel sync ca regresiile să nu scape
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(response.json()), len(statements)
+
+@pytest.mark.parametrize("path", ["/invoices/", "/invoices/summary"])
+def test_query_count_is_independent_of_page_size(client, path):
+    small_rows, small_queries = count_queries(client, f"{path}?limit=5")
+    large_rows, large_queries = count_queries(client, f"{path}?limit=50")
+
+    assert (small_rows, large_rows) == (5, 50)
+    assert small_queries == large_queries
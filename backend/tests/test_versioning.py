@@ -0,0 +1,64 @@
+"""O scriere confirmată între verificarea If-Match și UPDATE/DELETE dă 412, nu o actualizare pierdută."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import object_session
+from app.main import app
+from app.api import routes
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+@pytest.fixture
+def concurrent_write(monkeypatch):
+    # Simulează o altă cerere care a confirmat o modificare imediat după verificarea If-Match
+    def bump_after(check):
+        def checked(instance, if_match):
+            check(instance, if_match)
+            model = type(instance)
+            object_session(instance).execute(
+                update(model).where(model.id == instance.id).values(version=model.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        return checked
+    monkeypatch.setattr(routes, "check_invoice_if_match", bump_after(routes.check_invoice_if_match))
+    monkeypatch.setattr(routes, "check_organization_if_match", bump_after(routes.check_organization_if_match))
+
+def create_invoice(client, number):
+    org = client.post("/organizations/", json={"name": f"Org {number}"})
+    response = client.post("/invoices/", json={
+        "organization_id": org.json()["id"],
+        "invoice_number": number,
+        "issue_date": "2024-05-01",
+        "due_date": "2024-06-01",
+        "items": [{"description": "Servicii", "quantity": 1, "unit_price": 10}],
+    })
+    return org, response
+
+@pytest.mark.parametrize("method", ["put", "patch", "delete"])
+def test_invoice_write_loses_race(client, concurrent_write, method):
+    org, created = create_invoice(client, f"RACE-{method}")
+    invoice = created.json()
+    url = f"/invoices/{invoice['id']}"
+    headers = {"If-Match": created.headers["ETag"]}
+    body = {
+        "put": {**invoice, "notes": "pierdută", "items": [{"description": "Altceva", "quantity": 2, "unit_price": 3}]},
+        "patch": {"notes": "pierdută"},
+    }.get(method)
+
+    response = client.request(method.upper(), url, json=body, headers=headers)
+
+    assert response.status_code == 412
+    assert client.get(url).json() == invoice
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_organization_write_loses_race(client, concurrent_write, method):
+    org, _ = create_invoice(client, f"RACE-ORG-{method}")
+    url = f"/organizations/{org.json()['id']}"
+    body = {"name": "pierdută"} if method == "put" else None
+
+    response = client.request(method.upper(), url, json=body, headers={"If-Match": org.headers["ETag"]})
+
+    assert response.status_code == 412
+    assert client.get(url).json() == org.json()
@@ -1,65 +1,448 @@
 import requests
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+import os
+import random
+import socket
+import threading
 import time
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Varianta columnară a listelor (cheile o singură dată); gzip e decomprimat automat de requests
+COMPACT_MEDIA_TYPE = "application/vnd.invoice.columnar+json"
+# Serverul trimite keepalive la 15 secunde, deci o tăcere mai lungă înseamnă conexiune pierdută
+EVENTS_READ_TIMEOUT = 60
+# (connect, read) în secunde; fără timeout, un server blocat ține cererea la nesfârșit
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+# Conexiuni păstrate deschise per host; cel puțin câte thread-uri are QThreadPool
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+# Backoff exponențial cu jitter complet: pauza e aleatoare în [0, min(MAX, BASE * 2^încercare)]
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 8
+# Doar cererile idempotente se repetă; un POST repetat ar putea crea înregistrarea de două ori
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Citirile se repetă după orice eroare de transport. PUT/DELETE poartă If-Match: dacă prima încercare
+# a ajuns la server, repetarea primește 412 pentru propria salvare, deci se repetă doar când cererea
+# sigur n-a plecat (conexiune refuzată sau expirată) ori după 502/503
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Răspunsuri tranzitorii (proxy, worker repornit) după care merită reîncercat
+RETRY_STATUSES = {502, 503, 504}
+# 504 vine de la proxy după ce cererea a plecat spre backend, care poate să fi aplicat scrierea
+WRITE_RETRY_STATUSES = {502, 503}
+# Cât timp (secunde) un răspuns GET se servește din memorie, fără cerere; după TTL se revalidează
+# cu If-None-Match. Endpoint-urile fără TTL (/changes, /search) merg mereu la server
+CACHE_TTLS = {
+    "/organizations": 60,
+    "/invoices": 15,
+    "/reports": 30,
+}
+CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_SIZE", "256"))
+# O modificare reușită pe o resursă expiră și listele care o includ (facturile conțin numele organizației)
+CACHE_INVALIDATES = {
+    "/organizations": ("/organizations", "/invoices", "/reports"),
+    "/invoices": ("/invoices", "/reports"),
+}
+
+class ConflictError(Exception):
+    pass
+
+# Aceleași ETag-uri ca pe server, construite din versiunile din înregistrare
+def organization_etag(org: Dict) -> str:
+    return f'"{org["version"]}"'
+
+def invoice_etag(invoice: Dict) -> str:
+    # Factura afișează numele organizației, deci ETag-ul include și versiunea ei
+    return f'"{invoice["version"]}.{invoice["organization_version"]}"'
+
+class ResponseCache:
+    # LRU de răspunsuri GET: cheie -> (ETag, corp, headere utile, momentul ultimei validări).
+    # ETag-urile de aici sunt doar pentru If-None-Match; If-Match vine de la apelant
+    # Clientul e partajat între thread-uri, deci accesul trece prin lock
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttls: Optional[Dict[str, float]] = None):
+        self.max_entries = max_entries
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self.entries: "OrderedDict[str, Tuple[str, Any, Dict, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+
+    def ttl(self, key: str) -> float:
+        path = key.split('?', 1)[0]
+        return next((ttl for prefix, ttl in self.ttls.items() if path.startswith(prefix)), 0)
+
+    def get(self, key: str) -> Optional[Tuple[str, Any, Dict, float]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def fresh(self, key: str) -> Optional[Tuple[str, Any, Dict, float]]:
+        # Intrarea încă în TTL; hit/miss se numără doar pentru endpoint-urile cu TTL
+        ttl = self.ttl(key)
+        if not ttl:
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[3] < ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def store(self, key: str, etag: str, body: Any, headers: Dict):
+        with self.lock:
+            self.entries[key] = (etag, body, headers, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def revalidated(self, key: str):
+        # 304: datele sunt aceleași, TTL-ul pornește din nou
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries[key] = entry[:3] + (time.monotonic(),)
+            self.revalidations += 1
+
+    def pop(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def expire(self, prefixes: Tuple[str, ...]):
+        # Intrările expirate sunt date știute ca vechi: ETag-ul lor servește doar la revalidarea cu
+        # If-None-Match a următorului GET, niciodată ca precondiție pentru o scriere
+        if not prefixes:
+            return
+        with self.lock:
+            for key, entry in self.entries.items():
+                if key.startswith(prefixes):
+                    self.entries[key] = entry[:3] + (float('-inf'),)
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'entries': len(self.entries),
+            }
+
+def decode_compact(value):
+    if isinstance(value, dict) and value.keys() == {'columns', 'rows'}:
+        columns, rows = value['columns'], value['rows']
+        decoded = [dict(zip(columns, row)) for row in rows]
+        # Doar coloanele cu liste imbricate (ex. items) se decodează recursiv
+        nested = [column for column, cell in zip(columns, rows[0]) if isinstance(cell, (dict, list))] if rows else []
+        for entry in decoded:
+            for column in nested:
+                entry[column] = decode_compact(entry[column])
+        return decoded
+    if isinstance(value, list):
+        return [decode_compact(entry) for entry in value]
+    return value
+
+def request_not_sent(error: requests.exceptions.ConnectionError) -> bool:
+    # ConnectTimeout și NewConnectionError apar înainte ca cererea să fie scrisă pe socket
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
 class APIClient:
-    def __init__(self, base_url: str = "http://localhost:8000", max_retries: int = 3):
+    def __init__(self, base_url: str = "http://localhost:8000", max_retries: int = 3, compact: bool = False,
+                 timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT), pool_size: int = POOL_SIZE):
         self.base_url = base_url
         self.max_retries = max_retries
+        self.timeout = timeout
         self.session = requests.Session()
+        # Reîncercările le face _send, cu backoff; adapter-ul doar păstrează conexiunile
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Columnar ajută doar pe legături fără gzip; decodarea în Python costă mai mult decât json
+        # (vezi backend/benchmarks/payload_encoding.py), deci e opțional
+        if compact:
+            self.session.headers['Accept'] = f"{COMPACT_MEDIA_TYPE}, application/json"
+        # Cache de răspunsuri: servește GET-urile în TTL, apoi If-None-Match
+        self._cache = ResponseCache()
+        # Stream-ul /events deschis, ca close_events() să-l poată întrerupe din alt thread
+        self._events_lock = threading.Lock()
+        self._events_response = None
+        self._events_closed = False
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
 
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict:
+    def _send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         url = f"{self.base_url}{endpoint}"
-        retries = 0
+        kwargs.setdefault('timeout', self.timeout)
+        attempts = self.max_retries if method in IDEMPOTENT_METHODS else 1
         last_error = None
 
-        while retries < self.max_retries:
+        for attempt in range(attempts):
+            if attempt:
+                time.sleep(self._backoff(attempt))
             try:
                 response = self.session.request(method, url, **kwargs)
-                response.raise_for_status()
-                return response.json()
             except requests.exceptions.ConnectionError as e:
-                last_error = f"Could not connect to server: {str(e)}"
-                retries += 1
-                if retries < self.max_retries:
-                    time.sleep(1)  # Așteptăm 1 secundă înainte de reîncercare
+                if method in SAFE_METHODS or request_not_sent(e):
+                    last_error = f"Could not connect to server: {str(e)}"
+                    continue
+                raise Exception(f"Connection lost, the change may have been saved: {str(e)}")
+            except requests.exceptions.Timeout as e:
+                if method in SAFE_METHODS:
+                    last_error = f"Server did not respond in time: {str(e)}"
+                    continue
+                raise Exception(f"Server did not respond in time, the change may have been saved: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"API request failed: {str(e)}")
+
+            if method not in SAFE_METHODS and response.status_code == 504:
+                response.close()
+                raise Exception("Server did not respond in time, the change may have been saved: HTTP 504")
+            retry_statuses = RETRY_STATUSES if method in SAFE_METHODS else WRITE_RETRY_STATUSES
+            if response.status_code in retry_statuses and attempt + 1 < attempts:
+                last_error = f"Server unavailable: HTTP {response.status_code}"
+                response.close()
+                continue
+            if response.status_code == 412:
+                raise ConflictError("The record was changed by someone else. Reload it and try again.")
+            try:
+                response.raise_for_status()
             except requests.exceptions.RequestException as e:
                 raise Exception(f"API request failed: {str(e)}")
+            return response
 
         raise Exception(last_error or "Maximum retries exceeded")
 
+    @staticmethod
+    def _decode(response: requests.Response) -> Any:
+        body = response.json()
+        if response.headers.get('Content-Type', '').startswith(COMPACT_MEDIA_TYPE):
+            return decode_compact(body)
+        return body
+
+    @staticmethod
+    def _cache_key(endpoint: str, params: Optional[Dict] = None) -> str:
+        if not params:
+            return endpoint
+        return f"{endpoint}?{urlencode(sorted(params.items()), doseq=True)}"
+
+    def _get(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[Any, Dict]:
+        key = self._cache_key(endpoint, params)
+        fresh = self._cache.fresh(key)
+        if fresh:
+            return fresh[1], fresh[2]
+        cached = self._cache.get(key)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+
+        response = self._send("GET", endpoint, params=params, headers=headers)
+        # 304: serverul confirmă că datele din cache sunt încă valabile
+        if response.status_code == 304 and cached:
+            self._cache.revalidated(key)
+            return cached[1], cached[2]
+
+        body = self._decode(response)
+        extra_headers = {NEXT_CURSOR_HEADER: response.headers.get(NEXT_CURSOR_HEADER)}
+        etag = response.headers.get('ETag')
+        if etag:
+            self._cache.store(key, etag, body, extra_headers)
+        return body, extra_headers
+
+    def _make_request(self, method: str, endpoint: str, if_match: Optional[str] = None, **kwargs) -> Dict:
+        if method == "GET":
+            return self._get(endpoint, kwargs.get('params'))[0]
+
+        # Modificarea e condiționată doar de versiunea pe care o deține apelantul (dialogul sau rândul
+        # din tabel), nu de ce a rămas în cache: acolo ETag-ul poate fi vechi față de ce vede utilizatorul
+        if if_match is not None:
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'If-Match': if_match}
+
+        response = self._send(method, endpoint, **kwargs)
+        body = self._decode(response)
+        etag = response.headers.get('ETag')
+        self._cache.expire(self._invalidated_prefixes(endpoint))
+        if method == "DELETE":
+            self._cache.pop(endpoint)
+        elif etag and method in ("PUT", "PATCH"):
+            self._cache.store(endpoint, etag, body, {})
+        return body
+
+    @staticmethod
+    def _invalidated_prefixes(endpoint: str) -> Tuple[str, ...]:
+        return next((prefixes for resource, prefixes in CACHE_INVALIDATES.items()
+                     if endpoint.startswith(resource)), ())
+
+    def cache_stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+    @staticmethod
+    def _query_params(filters: Dict) -> Dict:
+        # Filtrele nesetate nu se trimit deloc
+        return {key: value for key, value in filters.items() if value is not None}
+
+    def _get_page(self, endpoint: str, cursor: Optional[str], limit: int, **filters) -> Tuple[List[Dict], Optional[str]]:
+        params = {**self._query_params(filters), 'limit': limit}
+        if cursor:
+            params['cursor'] = cursor
+        body, headers = self._get(endpoint, params)
+        return body, headers.get(NEXT_CURSOR_HEADER)
+
+    def _iter_pages(self, endpoint: str, limit: int, **filters) -> Iterator[List[Dict]]:
+        cursor = None
+        while True:
+            page, cursor = self._get_page(endpoint, cursor, limit, **filters)
+            if page:
+                yield page
+            if not cursor:
+                break
+
     def get_organizations(self) -> List[Dict]:
         return self._make_request("GET", "/organizations/")
 
+    def get_organizations_page(self, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict], Optional[str]]:
+        return self._get_page("/organizations/", cursor, limit)
+
+    def iter_organization_pages(self, limit: int = 100) -> Iterator[List[Dict]]:
+        return self._iter_pages("/organizations/", limit)
+
     def get_organization(self, org_id: int) -> Dict:
         return self._make_request("GET", f"/organizations/{org_id}")
 
     def create_organization(self, data: Dict) -> Dict:
         return self._make_request("POST", "/organizations/", json=data)
 
-    def update_organization(self, org_id: int, data: Dict) -> Dict:
-        return self._make_request("PUT", f"/organizations/{org_id}", json=data)
+    def update_organization(self, org_id: int, data: Dict, if_match: Optional[str] = None) -> Dict:
+        return self._make_request("PUT", f"/organizations/{org_id}", if_match=if_match, json=data)
 
-    def delete_organization(self, org_id: int) -> None:
-        self._make_request("DELETE", f"/organizations/{org_id}")
+    def delete_organization(self, org_id: int, if_match: Optional[str] = None) -> None:
+        self._make_request("DELETE", f"/organizations/{org_id}", if_match=if_match)
 
-    def get_invoices(self) -> List[Dict]:
+    def get_invoices(self, **filters) -> List[Dict]:
         try:
-            response = self._make_request("GET", "/invoices/")
+            response = self._make_request("GET", "/invoices/", params=self._query_params(filters))
             return response
         except Exception as e:
             print(f"Error in get_invoices: {str(e)}")
             print(f"Response content: {getattr(e, 'response', {}).get('content', 'No content')}")
             raise
 
+    def get_invoice_summaries(self, **filters) -> List[Dict]:
+        return self._make_request("GET", "/invoices/summary", params=self._query_params(filters))
+
+    def get_invoice_summaries_page(self, cursor: Optional[str] = None, limit: int = 100, **filters) -> Tuple[List[Dict], Optional[str]]:
+        return self._get_page("/invoices/summary", cursor, limit, **filters)
+
+    def get_invoices_page(self, cursor: Optional[str] = None, limit: int = 100, **filters) -> Tuple[List[Dict], Optional[str]]:
+        return self._get_page("/invoices/", cursor, limit, **filters)
+
+    def iter_invoice_pages(self, limit: int = 100, **filters) -> Iterator[List[Dict]]:
+        return self._iter_pages("/invoices/", limit, **filters)
+
+    def export_invoices(self, path: str, export_format: str = "csv", **filters) -> None:
+        params = {**self._query_params(filters), 'format': export_format}
+        response = self._send("GET", "/invoices/export", params=params, stream=True)
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=65536):
+                f.write(chunk)
+
     def get_invoice(self, invoice_id: int) -> Dict:
         return self._make_request("GET", f"/invoices/{invoice_id}")
 
     def create_invoice(self, data: Dict) -> Dict:
         return self._make_request("POST", "/invoices/", json=data)
 
-    def update_invoice(self, invoice_id: int, data: Dict) -> Dict:
-        return self._make_request("PUT", f"/invoices/{invoice_id}", json=data)
+    def import_invoices(self, invoices: List[Dict]) -> Dict:
+        return self._make_request("POST", "/invoices/bulk", json=invoices)
+
+    def update_invoice(self, invoice_id: int, data: Dict, if_match: Optional[str] = None) -> Dict:
+        return self._make_request("PUT", f"/invoices/{invoice_id}", if_match=if_match, json=data)
+
+    def patch_invoice(self, invoice_id: int, data: Dict, if_match: Optional[str] = None) -> Dict:
+        return self._make_request("PATCH", f"/invoices/{invoice_id}", if_match=if_match, json=data)
+
+    def delete_invoice(self, invoice_id: int, if_match: Optional[str] = None) -> None:
+        self._make_request("DELETE", f"/invoices/{invoice_id}", if_match=if_match)
+
+    def search(self, q: str, entity: Optional[str] = None, skip: int = 0, limit: int = 20) -> List[Dict]:
+        params = self._query_params({'q': q, 'entity': entity, 'skip': skip, 'limit': limit})
+        return self._make_request("GET", "/search", params=params)
+
+    def get_organization_report(self, as_of: Optional[str] = None) -> List[Dict]:
+        return self._make_request("GET", "/reports/organizations", params=self._query_params({'as_of': as_of}))
+
+    def get_period_report(self, **filters) -> List[Dict]:
+        return self._make_request("GET", "/reports/periods", params=self._query_params(filters))
+
+    def get_changes(self, since: Optional[str] = None) -> Dict:
+        params = {'since': since} if since is not None else None
+        changes = self._make_request("GET", "/changes", params=params)
+        # Modificările făcute de alți clienți expiră răspunsurile din cache înainte de TTL
+        if changes['organizations'] or changes['deleted_organizations']:
+            self._cache.expire(CACHE_INVALIDATES['/organizations'])
+        elif changes['invoices'] or changes['deleted_invoices']:
+            self._cache.expire(CACHE_INVALIDATES['/invoices'])
+        return changes
+
+    def listen_changes(self, since: Optional[str] = None) -> Iterator[str]:
+        # Stream Server-Sent Events; fiecare eveniment poartă tokenul ultimei modificări
+        headers = {'Accept': 'text/event-stream'}
+        if since is not None:
+            headers['Last-Event-ID'] = since
+        response = self._send("GET", "/events", headers=headers, stream=True,
+                              timeout=(5, EVENTS_READ_TIMEOUT))
+        with self._events_lock:
+            if self._events_closed:
+                response.close()
+                return
+            self._events_response = response
+        try:
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith('data:'):
+                        yield line[len('data:'):].strip()
+        finally:
+            with self._events_lock:
+                self._events_response = None
+
+    def close_events(self):
+        # Apelat din alt thread: iter_lines() stă blocat în recv până la următorul keepalive,
+        # iar session.close() nu-l trezește; doar închiderea socket-ului îl deblochează
+        with self._events_lock:
+            self._events_closed = True
+            response = self._events_response
+        if response is not None:
+            shutdown_stream(response)
+
+def shutdown_stream(response: requests.Response):
+    raw = response.raw
+    # urllib3 >= 2.3 are shutdown(); pe versiunile mai vechi închidem direct socket-ul conexiunii
+    if hasattr(raw, 'shutdown'):
+        raw.shutdown()
+        return
+    sock = getattr(getattr(raw, 'connection', None) or getattr(raw, '_connection', None), 'sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
 
-    def delete_invoice(self, invoice_id: int) -> None:
-        self._make_request("DELETE", f"/invoices/{invoice_id}")
\ No newline at end of file
+def shared_client() -> APIClient:
+    # Un singur client pentru toată aplicația: view-urile și dialogurile refolosesc conexiunile
+    # din același pool și același cache de ETag-uri
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = APIClient()
+        return _shared_client
@@ -0,0 +1,45 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from .client import APIClient
+
+# Cât așteaptă stop() ieșirea din run(); close_events și evenimentul de oprire o deblochează de obicei imediat
+STOP_TIMEOUT_MS = 2000
+# Thread-uri care n-au ieșit la timp: un QThread distrus cât rulează oprește procesul, deci le ținem în viață
+_detached = []
+
+class ChangeListener(QThread):
+    # Emis cu tokenul noii modificări; view-urile își aduc apoi delta prin /changes
+    changed = pyqtSignal(str)
+
+    def __init__(self, parent=None, reconnect_delay: float = 3):
+        super().__init__(parent)
+        # Client propriu, nu cel partajat: stream-ul ține o conexiune ocupată, iar stop() o închide
+        self.api_client = APIClient(max_retries=1)
+        self.reconnect_delay = reconnect_delay
+        self.token = None
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                for token in self.api_client.listen_changes(self.token):
+                    if self._stopped.is_set():
+                        return
+                    self.token = token
+                    self.changed.emit(token)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    print(f"Change listener disconnected: {str(e)}")
+            # Pauza de reconectare se întrerupe imediat la stop()
+            self._stopped.wait(self.reconnect_delay)
+
+    def stop(self):
+        self._stopped.set()
+        # Închiderea socket-ului deblochează citirea din stream; rămâne cel mult o conectare în curs
+        self.api_client.close_events()
+        if not self.wait(STOP_TIMEOUT_MS):
+            # Fereastra nu mai așteaptă; thread-ul iese singur după timeout-ul conexiunii
+            self.setParent(None)
+            _detached.append(self)
+            return
+        self.api_client.session.close()
@@ -0,0 +1,100 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# Task-urile aflate pe pool, ținute în viață până ies din run(): la închidere fereastra le așteaptă doar
+# un timp limitat, iar un task care termină după distrugerea view-ului are încă semnalele lui
+_active = set()
+
+class RequestSignals(QObject):
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    # Emis la final în orice caz, și pentru task-urile anulate înainte să pornească
+    finished = pyqtSignal()
+
+class RequestTask(QRunnable):
+    def __init__(self, fn, args, kwargs):
+        super().__init__()
+        # Referința Python ține task-ul în viață până la livrarea rezultatului
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = RequestSignals()
+        self.cancelled = False
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            try:
+                result = self.fn(*self.args, **self.kwargs)
+            except Exception as e:
+                self._emit('error', str(e))
+                return
+            self._emit('result', result)
+        finally:
+            self._emit('finished')
+            _active.discard(self)
+
+    def _emit(self, name, *args):
+        try:
+            getattr(self.signals, name).emit(*args)
+        except RuntimeError:
+            # La ieșirea din aplicație PyQt distruge obiectele C++ rămase, inclusiv semnalele unui task
+            # pe care fereastra n-a mai apucat să-l aștepte; rezultatul nu mai are unde ajunge
+            pass
+
+class RequestRunner(QObject):
+    # Apelurile către API rulează pe QThreadPool; rezultatele revin pe thread-ul GUI.
+    # O cerere nouă cu aceeași cheie o anulează pe cea veche: rezultatul vechi nu mai ajunge în UI
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.tasks = {}
+        self.pending = set()
+
+    def run(self, key, fn, *args, on_result=None, on_error=None, **kwargs):
+        self.cancel(key)
+        task = RequestTask(fn, args, kwargs)
+        task.signals.result.connect(lambda result: self._deliver(key, task, on_result, result))
+        task.signals.error.connect(lambda error: self._deliver(key, task, on_error, error))
+        task.signals.finished.connect(lambda: self._finish(task))
+        self.tasks[key] = task
+        self.pending.add(task)
+        if len(self.pending) == 1:
+            self.busy_changed.emit(True)
+        _active.add(task)
+        self.pool.start(task)
+        return task
+
+    def cancel(self, key):
+        task = self.tasks.pop(key, None)
+        if task is None:
+            return
+        task.cancelled = True
+        # Dacă n-a pornit încă, îl scoatem din coadă; altfel rezultatul lui e ignorat la livrare,
+        # iar finished îl scoate din pending
+        if self.pool.tryTake(task):
+            _active.discard(task)
+            self._finish(task)
+
+    def cancel_all(self):
+        for key in list(self.tasks):
+            self.cancel(key)
+
+    def is_running(self, key):
+        return key in self.tasks
+
+    def _finish(self, task):
+        if task not in self.pending:
+            return
+        self.pending.discard(task)
+        if not self.pending:
+            self.busy_changed.emit(False)
+
+    def _deliver(self, key, task, callback, value):
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if not task.cancelled and callback is not None:
+            callback(value)
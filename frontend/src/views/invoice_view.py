@@ -1,27 +1,55 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QTableWidget, QTableWidgetItem, QDialog, QLineEdit, 
+                            QTableWidget, QTableView, QDialog, QLineEdit, 
                             QFormLayout, QMessageBox, QLabel, QHeaderView,
-                            QDateEdit, QComboBox, QSpinBox, QDoubleSpinBox)
-from PyQt6.QtCore import Qt, QDate, QLocale
-from ..api.client import APIClient
+                            QDateEdit, QComboBox, QSpinBox, QDoubleSpinBox, QProgressBar)
+from PyQt6.QtCore import Qt, QDate, QLocale, QTimer
+from ..api.client import invoice_etag, shared_client
+from ..api.worker import RequestRunner
+from .tables import PAGE_SIZE, RecordTableModel, ActionButtonsDelegate
 from decimal import Decimal
 
+# Așteptăm o pauză în tastare înainte de a interoga serverul
+SEARCH_DEBOUNCE_MS = 300
+SEARCH_LIMIT = 100
+
+class InvoiceTableModel(RecordTableModel):
+    COLUMNS = ["ID", "Organization", "Invoice Number", "Issue Date", "Due Date", "Total Amount", "Actions"]
+    ACTIONS_COLUMN = 6
+
+    def display_value(self, inv, column):
+        if column == 0:
+            return str(inv['id'])
+        if column == 1:
+            return inv.get('organization_name', 'N/A')
+        if column == 2:
+            return inv['invoice_number']
+        if column == 3:
+            return str(inv['issue_date'])
+        if column == 4:
+            return str(inv['due_date'])
+        if column == 5:
+            return f"${float(inv['total_amount']):.2f}"
+        return None
+
+    def rename_organizations(self, organizations):
+        # Versiunea organizației face parte din ETag-ul facturii, deci se actualizează odată cu numele
+        def rename(inv):
+            org = organizations.get(inv.get('organization_id'))
+            if org is None or (inv.get('organization_name'), inv.get('organization_version')) == (org['name'], org['version']):
+                return None
+            return {**inv, 'organization_name': org['name'], 'organization_version': org['version']}
+        if organizations:
+            self.update_column(1, rename)
+
 class InvoiceView(QWidget):
     def __init__(self):
         super().__init__()
-        self.api_client = APIClient()
+        self.api_client = shared_client()
+        # Cererile rulează în fundal, ca fereastra să nu se blocheze când serverul răspunde greu
+        self.runner = RequestRunner(self)
+        self.change_token = None
         self.init_ui()
-        
-
-        try:
-            self.load_invoices()
-        except Exception as e:
-            QMessageBox.warning(
-                self,
-                "Connection Error",
-                "Could not connect to server. Please ensure the backend is running.\n\n"
-                f"Error: {str(e)}"
-            )
+        self.load_invoices()
         
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -32,6 +60,27 @@ class InvoiceView(QWidget):
         title.setStyleSheet("font-size: 24px; font-weight: bold; color: #2c3e50;")
         header_layout.addWidget(title)
         
+        # Căutare full-text cu debounce
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search invoices...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setMinimumWidth(250)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.apply_search)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        header_layout.addWidget(self.search_input)
+        
+        # Indicator afișat cât timp există cereri în curs
+        self.loading = QProgressBar()
+        self.loading.setRange(0, 0)
+        self.loading.setMaximumWidth(120)
+        self.loading.setTextVisible(False)
+        self.loading.hide()
+        self.runner.busy_changed.connect(self.loading.setVisible)
+        header_layout.addWidget(self.loading)
+        
         btn_add = QPushButton("Create Invoice")
         btn_add.setStyleSheet("""
             QPushButton {
@@ -51,13 +100,25 @@ class InvoiceView(QWidget):
         
         layout.addLayout(header_layout)
         
-        # Tabel
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Organization", "Invoice Number", 
-            "Issue Date", "Due Date", "Total Amount", "Actions"
-        ])
+        # Tabel: modelul ține rândurile, view-ul desenează doar ce e vizibil
+        self.model = InvoiceTableModel(self.runner, self)
+        self.model.load_failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Could not load invoices: {error}")
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.actions_delegate = ActionButtonsDelegate([
+            ('edit', "Edit", "#2196F3", "#1976D2"),
+            ('delete', "Delete", "#f44336", "#d32f2f"),
+        ], self.table)
+        self.table.setItemDelegateForColumn(InvoiceTableModel.ACTIONS_COLUMN, self.actions_delegate)
+        # Dialogurile se deschid după ce delegate-ul a terminat de tratat clicul
+        self.actions_delegate.clicked.connect(self.run_action, Qt.ConnectionType.QueuedConnection)
+        self.table.setMouseTracking(True)
+
+        # Înălțime fixă: view-ul nu măsoară fiecare rând
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(40)
 
         self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)  
         self.table.setColumnWidth(0, 50) 
@@ -80,7 +141,7 @@ class InvoiceView(QWidget):
         self.table.setColumnWidth(6, 200)
 
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #e0e0e0;
                 border-radius: 4px;
                 background-color: white;
@@ -94,90 +155,105 @@ class InvoiceView(QWidget):
                 font-weight: bold;
                 color: #2c3e50;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
                 color: #333333;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #2c3e50;
             }
         """)
         layout.addWidget(self.table)
         
+    def fetch_invoice_page(self, cursor):
+        # Tabelul afișează doar antetul facturii, deci nu descărcăm items
+        return self.api_client.get_invoice_summaries_page(cursor, PAGE_SIZE)
+
     def load_invoices(self):
-        try:
-            invoices = self.api_client.get_invoices()
-            self.table.setRowCount(len(invoices))
-            for i, inv in enumerate(invoices):
-                try:
-                    self.table.setItem(i, 0, QTableWidgetItem(str(inv['id'])))
-                    self.table.setItem(i, 1, QTableWidgetItem(inv.get('organization_name', 'N/A')))
-                    self.table.setItem(i, 2, QTableWidgetItem(inv['invoice_number']))
-                    self.table.setItem(i, 3, QTableWidgetItem(str(inv['issue_date'])))
-                    self.table.setItem(i, 4, QTableWidgetItem(str(inv['due_date'])))
-                    self.table.setItem(i, 5, QTableWidgetItem(f"${float(inv['total_amount']):.2f}"))
-                    
-                    actions_widget = QWidget()
-                    actions_layout = QHBoxLayout(actions_widget)
-                    actions_layout.setContentsMargins(4, 4, 4, 4)
-                    
-                except KeyError:
-                    self.table.setItem(i, 1, QTableWidgetItem("N/A"))
-                
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(4, 4, 4, 4)
-                
-                btn_edit = QPushButton("Edit")
-                btn_delete = QPushButton("Delete")
-                
-                btn_edit.setStyleSheet("""
-                    QPushButton {
-                        background-color: #2196F3;
-                        color: white;
-                        padding: 5px 15px;
-                        border-radius: 3px;
-                    }
-                    QPushButton:hover {
-                        background-color: #1976D2;
-                    }
-                """)
-                
-                btn_delete.setStyleSheet("""
-                    QPushButton {
-                        background-color: #f44336;
-                        color: white;
-                        padding: 5px 15px;
-                        border-radius: 3px;
-                    }
-                    QPushButton:hover {
-                        background-color: #d32f2f;
-                    }
-                """)
-                
-                btn_edit.clicked.connect(lambda checked, invoice=inv: self.show_edit_dialog(invoice))
-                btn_delete.clicked.connect(lambda checked, invoice_id=inv['id']: self.delete_invoice(invoice_id))
-                
-                actions_layout.addWidget(btn_edit)
-                actions_layout.addWidget(btn_delete)
-                actions_layout.addStretch()
-                
-                self.table.setCellWidget(i, 6, actions_widget)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not load invoices: {str(e)}")
+        def load():
+            # Tokenul se citește înaintea listei, ca nicio modificare să nu scape între ele
+            token = self.api_client.get_changes()['next_token']
+            invoices, cursor = self.fetch_invoice_page(None)
+            return invoices, cursor, token
+        # Restul paginilor se aduc pe măsură ce utilizatorul derulează
+        self.model.load(load, self.fetch_invoice_page, loaded=self.set_change_token)
+
+    def set_change_token(self, token):
+        self.change_token = token
+
+    def fetch_changes(self, token):
+        # Rulează în fundal: adună toate paginile de modificări de la token
+        pages = []
+        while True:
+            changes = self.api_client.get_changes(token)
+            pages.append(changes)
+            token = changes['next_token']
+            if not changes['has_more']:
+                return pages
+
+    def sync_invoices(self):
+        # Aplicăm doar modificările de la ultimul token, fără să reîncărcăm tot tabelul
+        if self.change_token is None:
+            return
+        self.runner.run(
+            'sync', self.fetch_changes, self.change_token,
+            on_result=self.apply_changes,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not refresh invoices: {error}")
+        )
+
+    def apply_changes(self, pages):
+        for changes in pages:
+            for invoice_id in changes['deleted_invoices']:
+                self.model.remove_record(invoice_id)
+            for inv in changes['invoices']:
+                self.model.upsert_record(inv)
+            # Redenumirea unei organizații se reflectă în facturile ei
+            self.model.rename_organizations({org['id']: org for org in changes['organizations']})
+            self.change_token = changes['next_token']
+        # Rândurile noi sau modificate trebuie filtrate din nou
+        if self.search_input.text().strip():
+            self.search_timer.start()
+
+    def search_invoices(self, query):
+        results = self.api_client.search(query, entity='invoice', limit=SEARCH_LIMIT)
+        ids = [result['id'] for result in results]
+        invoices = self.api_client.get_invoice_summaries(ids=ids, limit=len(ids)) if ids else []
+        # Păstrăm ordinea relevanței, nu pe cea a listei
+        rank = {invoice_id: i for i, invoice_id in enumerate(ids)}
+        return sorted(invoices, key=lambda inv: rank[inv['id']]), None
+
+    def apply_search(self):
+        # O căutare nouă o înlocuiește pe cea în curs, inclusiv paginile listei complete
+        query = self.search_input.text().strip()
+        if query:
+            self.model.load(lambda: self.search_invoices(query))
+        else:
+            self.model.load(lambda: self.fetch_invoice_page(None), self.fetch_invoice_page)
+
+    def run_action(self, action, invoice_id):
+        if action == 'edit':
+            self.show_edit_dialog(invoice_id)
+        elif action == 'delete':
+            self.delete_invoice(invoice_id)
 
     def show_add_dialog(self):
         dialog = InvoiceDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_invoices()
+            self.sync_invoices()
             
-    def show_edit_dialog(self, invoice):
+    def show_edit_dialog(self, invoice_id):
+        self.runner.run(
+            'open', self.api_client.get_invoice, invoice_id,
+            on_result=self.open_edit_dialog,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not load invoice: {error}")
+        )
+
+    def open_edit_dialog(self, invoice):
         dialog = InvoiceDialog(self, invoice)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_invoices()
+            self.sync_invoices()
             
     def show_view_dialog(self, invoice_id):
         try:
@@ -234,16 +310,20 @@ class InvoiceView(QWidget):
         response = msg_box.exec()
         
         if msg_box.clickedButton() == yes_button:
-            try:
-                self.api_client.delete_invoice(invoice_id)
-                self.load_invoices()
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Could not delete invoice: {str(e)}")
+            # Ștergerea e condiționată de versiunea afișată în tabel
+            record = self.model.record(invoice_id)
+            self.runner.run(
+                f'delete-{invoice_id}', self.api_client.delete_invoice, invoice_id,
+                if_match=invoice_etag(record) if record else None,
+                on_result=lambda _: self.sync_invoices(),
+                on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not delete invoice: {error}")
+            )
 
 class InvoiceDialog(QDialog):
     def __init__(self, parent=None, invoice=None):
         super().__init__(parent)
-        self.api_client = APIClient()
+        self.api_client = shared_client()
+        self.runner = RequestRunner(self)
         self.invoice = invoice
         self.items = []
         self.init_ui()
@@ -336,13 +416,15 @@ class InvoiceDialog(QDialog):
         
         # Buttons
         buttons = QHBoxLayout()
-        btn_save = QPushButton("Save")
+        self.btn_save = QPushButton("Save")
         btn_cancel = QPushButton("Cancel")
         
-        btn_save.clicked.connect(self.save_invoice)
+        self.btn_save.clicked.connect(self.save_invoice)
         btn_cancel.clicked.connect(self.reject)
+        # Cât timp o cerere e în curs, Save nu poate trimite încă una
+        self.runner.busy_changed.connect(self.btn_save.setDisabled)
         
-        buttons.addWidget(btn_save)
+        buttons.addWidget(self.btn_save)
         buttons.addWidget(btn_cancel)
         layout.addLayout(buttons)
         
@@ -436,6 +518,8 @@ class InvoiceDialog(QDialog):
         
         # Setăm valorile dacă avem date
         if item_data:
+            # Păstrăm id-ul item-ului ca serverul să-l actualizeze în loc să-l recreeze
+            description.setProperty('item_id', item_data.get('id'))
             description.setText(item_data['description'])
             quantity.setValue(float(item_data['quantity']))
             unit_price.setValue(float(item_data['unit_price']))
@@ -482,18 +566,23 @@ class InvoiceDialog(QDialog):
         try:
             items = []
             for row in range(self.items_table.rowCount()):
-                description = self.items_table.cellWidget(row, 0).text()
+                description_widget = self.items_table.cellWidget(row, 0)
+                description = description_widget.text()
                 quantity = self.items_table.cellWidget(row, 1).value()
                 unit_price = self.items_table.cellWidget(row, 2).value()
                 
                 if not description or quantity <= 0 or unit_price <= 0:
                     raise ValueError("All items must have description and valid quantity/price")
                     
-                items.append({
+                item = {
                     'description': description,
                     'quantity': quantity,
                     'unit_price': unit_price
-                })
+                }
+                item_id = description_widget.property('item_id')
+                if item_id is not None:
+                    item['id'] = item_id
+                items.append(item)
             
             if not items:
                 raise ValueError("Invoice must have at least one item")
@@ -514,36 +603,47 @@ class InvoiceDialog(QDialog):
             if not data['invoice_number']:
                 raise ValueError("Invoice number is required")
                 
-            # Trimitem request-ul
+            # Trimitem request-ul în fundal; dialogul se închide când serverul confirmă
             if self.invoice:
-                response = self.api_client.update_invoice(self.invoice['id'], data)
+                self.runner.run('save', self.api_client.update_invoice, self.invoice['id'], data,
+                                if_match=invoice_etag(self.invoice),
+                                on_result=lambda _: self.accept(), on_error=self.save_failed)
             else:
-                response = self.api_client.create_invoice(data)
-                
-            self.accept()
+                self.runner.run('save', self.api_client.create_invoice, data,
+                                on_result=lambda _: self.accept(), on_error=self.save_failed)
             
         except ValueError as e:
             QMessageBox.warning(self, "Validation Error", str(e))
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not save invoice: {str(e)}")
+
+    def save_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Could not save invoice: {error}")
             
     def load_organizations(self):
-        try:
-            organizations = self.api_client.get_organizations()
-            for org in organizations:
-                self.org_combo.addItem(org['name'], org['id'])
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not load organizations: {str(e)}")
+        self.runner.run(
+            'organizations', self.api_client.get_organizations,
+            on_result=self.fill_organizations,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not load organizations: {error}")
+        )
+
+    def fill_organizations(self, organizations):
+        for org in organizations:
+            self.org_combo.addItem(org['name'], org['id'])
+        # Organizațiile sosesc după datele facturii, deci selecția se face aici
+        if self.invoice:
+            index = self.org_combo.findData(self.invoice['organization_id'])
+            if index >= 0:
+                self.org_combo.setCurrentIndex(index)
+
+    def done(self, result):
+        # Rezultatele sosite după închidere nu mai ajung la dialog
+        self.runner.cancel_all()
+        super().done(result)
             
     def load_invoice_data(self):
         self.invoice_number.setText(self.invoice['invoice_number'])
         self.issue_date.setDate(QDate.fromString(self.invoice['issue_date'], Qt.DateFormat.ISODate))
         self.due_date.setDate(QDate.fromString(self.invoice['due_date'], Qt.DateFormat.ISODate))
         self.notes.setText(self.invoice.get('notes', ''))
-        
-        index = self.org_combo.findData(self.invoice['organization_id'])
-        if index >= 0:
-            self.org_combo.setCurrentIndex(index)
             
         for item in self.invoice['items']:
             self.add_item_row(item)
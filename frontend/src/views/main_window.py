@@ -1,8 +1,12 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QPushButton, QStackedWidget, QLabel)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThreadPool
 from .organization_view import OrganizationView
 from .invoice_view import InvoiceView
+from ..api.listener import ChangeListener
+
+# Cât așteaptă închiderea ferestrei cererile aflate încă pe QThreadPool
+CLOSE_TIMEOUT_MS = 3000
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -123,6 +127,21 @@ class MainWindow(QMainWindow):
         # Setăm view-ul inițial
         self.show_organizations()
         
+        # Modificările altor utilizatori ajung prin server push și se aplică pe loc
+        self.change_listener = ChangeListener(self)
+        self.change_listener.changed.connect(lambda token: self.organization_view.sync_organizations())
+        self.change_listener.changed.connect(lambda token: self.invoice_view.sync_invoices())
+        self.change_listener.start()
+        
+    def closeEvent(self, event):
+        self.change_listener.stop()
+        # Cererile deja pornite rulează încă pe QThreadPool; le dăm un timp limitat să termine, apoi
+        # închidem oricum (task-urile rămase se țin singure în viață până ies)
+        for view in (self.organization_view, self.invoice_view):
+            view.runner.cancel_all()
+        QThreadPool.globalInstance().waitForDone(CLOSE_TIMEOUT_MS)
+        super().closeEvent(event)
+        
     def show_organizations(self):
         self.stack.setCurrentWidget(self.organization_view)
         self.btn_organizations.setChecked(True)
@@ -1,13 +1,33 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                            QTableWidget, QTableWidgetItem, QDialog, QLineEdit, 
-                            QFormLayout, QMessageBox, QLabel, QHeaderView)
+                            QTableView, QDialog, QLineEdit, 
+                            QFormLayout, QMessageBox, QLabel, QHeaderView, QProgressBar)
 from PyQt6.QtCore import Qt
-from ..api.client import APIClient
+from ..api.client import organization_etag, shared_client
+from ..api.worker import RequestRunner
+from .tables import PAGE_SIZE, RecordTableModel, ActionButtonsDelegate
+
+class OrganizationTableModel(RecordTableModel):
+    COLUMNS = ["ID", "Name", "Fiscal Code", "Address", "Actions"]
+    ACTIONS_COLUMN = 4
+
+    def display_value(self, org, column):
+        if column == 0:
+            return str(org['id'])
+        if column == 1:
+            return org['name']
+        if column == 2:
+            return org['fiscal_code'] or ''
+        if column == 3:
+            return org['address'] or ''
+        return None
 
 class OrganizationView(QWidget):
     def __init__(self):
         super().__init__()
-        self.api_client = APIClient()
+        self.api_client = shared_client()
+        # Cererile rulează în fundal, ca fereastra să nu se blocheze când serverul răspunde greu
+        self.runner = RequestRunner(self)
+        self.change_token = None
         self.init_ui()
         self.load_organizations()
         
@@ -36,18 +56,46 @@ class OrganizationView(QWidget):
         """)
         btn_add.clicked.connect(self.show_add_dialog)
         header_layout.addStretch()
+        
+        # Indicator afișat cât timp există cereri în curs
+        self.loading = QProgressBar()
+        self.loading.setRange(0, 0)
+        self.loading.setMaximumWidth(120)
+        self.loading.setTextVisible(False)
+        self.loading.hide()
+        self.runner.busy_changed.connect(self.loading.setVisible)
+        header_layout.addWidget(self.loading)
         header_layout.addWidget(btn_add)
         
         layout.addLayout(header_layout)
         
-        # Tabel
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "Name", "Fiscal Code", "Address", "Actions"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        # Tabel: modelul ține rândurile, view-ul desenează doar ce e vizibil
+        self.model = OrganizationTableModel(self.runner, self)
+        self.model.load_failed.connect(
+            lambda error: QMessageBox.critical(self, "Error", f"Could not load organizations: {error}")
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.actions_delegate = ActionButtonsDelegate([
+            ('edit', "Edit", "#2196F3", "#1976D2"),
+            ('delete', "Delete", "#f44336", "#d32f2f"),
+        ], self.table)
+        self.table.setItemDelegateForColumn(OrganizationTableModel.ACTIONS_COLUMN, self.actions_delegate)
+        # Dialogurile se deschid după ce delegate-ul a terminat de tratat clicul
+        self.actions_delegate.clicked.connect(self.run_action, Qt.ConnectionType.QueuedConnection)
+        self.table.setMouseTracking(True)
+
+        # Lățimi și înălțimi fixe: ResizeToContents ar măsura fiecare rând la fiecare modificare
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(40)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.table.setColumnWidth(0, 50)
+        self.table.setColumnWidth(1, 250)
+        self.table.setColumnWidth(2, 150)
+        self.table.setColumnWidth(4, 170)
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #e0e0e0;
                 border-radius: 4px;
                 background-color: white;
@@ -61,131 +109,108 @@ class OrganizationView(QWidget):
                 font-weight: bold;
                 color: #2c3e50;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #f0f0f0;
                 color: #333333;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #e3f2fd;
                 color: #2c3e50;
             }
         """)
         layout.addWidget(self.table)
         
+    def fetch_organization_page(self, cursor):
+        return self.api_client.get_organizations_page(cursor, PAGE_SIZE)
+
     def load_organizations(self):
-        try:
-            organizations = self.api_client.get_organizations()
-            self.table.setRowCount(len(organizations))
-            for i, org in enumerate(organizations):
-                self.table.setItem(i, 0, QTableWidgetItem(str(org['id'])))
-                self.table.setItem(i, 1, QTableWidgetItem(org['name']))
-                self.table.setItem(i, 2, QTableWidgetItem(org['fiscal_code'] or ''))
-                self.table.setItem(i, 3, QTableWidgetItem(org['address'] or ''))
-                
-                # Butoane pentru acțiuni
-                actions_widget = QWidget()
-                actions_layout = QHBoxLayout(actions_widget)
-                actions_layout.setContentsMargins(4, 4, 4, 4)
-                
-                # Creăm funcții separate pentru fiecare buton
-                def create_edit_handler(org_id):
-                    return lambda: self.show_edit_dialog(org_id)
-                
-                def create_delete_handler(org_id):
-                    return lambda: self.delete_organization(org_id)
-                
-                btn_edit = QPushButton("Edit")
-                btn_delete = QPushButton("Delete")
-                
-                # Stil comun pentru butoane
-                button_style = """
-                    QPushButton {
-                        color: white;
-                        padding: 6px 12px;
-                        border-radius: 4px;
-                        font-weight: bold;
-                        font-size: 12px;
-                        min-width: 70px;
-                        margin: 0 3px;
-                    }
-                """
-                
-                # Stil pentru butonul Edit
-                btn_edit.setStyleSheet(button_style + """
-                    QPushButton {
-                        background-color: #2196F3;
-                    }
-                    QPushButton:hover {
-                        background-color: #1976D2;
-                    }
-                    QPushButton:pressed {
-                        background-color: #1565C0;
-                    }
-                """)
-                
-                # Stil pentru butonul Delete
-                btn_delete.setStyleSheet(button_style + """
-                    QPushButton {
-                        background-color: #f44336;
-                    }
-                    QPushButton:hover {
-                        background-color: #d32f2f;
-                    }
-                    QPushButton:pressed {
-                        background-color: #c62828;
-                    }
-                """)
-                
-                # Ajustăm layout-ul pentru butoane
-                actions_layout.setSpacing(8)  # Spațiu între butoane
-                actions_layout.setContentsMargins(8, 4, 8, 4)  # Margini pentru container
-                
-                actions_widget.setStyleSheet("""
-                    QWidget {
-                        background: transparent;
-                    }
-                """)
-                
-                # Conectăm butoanele folosind funcțiile create
-                btn_edit.clicked.connect(create_edit_handler(org['id']))
-                btn_delete.clicked.connect(create_delete_handler(org['id']))
-                
-                actions_layout.addWidget(btn_edit)
-                actions_layout.addWidget(btn_delete)
-                actions_layout.addStretch()
-                
-                self.table.setCellWidget(i, 4, actions_widget)
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not load organizations: {str(e)}")
+        def load():
+            # Tokenul se citește înaintea listei, ca nicio modificare să nu scape între ele
+            token = self.api_client.get_changes()['next_token']
+            organizations, cursor = self.fetch_organization_page(None)
+            return organizations, cursor, token
+        # Restul paginilor se aduc pe măsură ce utilizatorul derulează
+        self.model.load(load, self.fetch_organization_page, loaded=self.set_change_token)
+
+    def set_change_token(self, token):
+        self.change_token = token
+
+    def fetch_changes(self, token):
+        # Rulează în fundal: adună toate paginile de modificări de la token
+        pages = []
+        while True:
+            changes = self.api_client.get_changes(token)
+            pages.append(changes)
+            token = changes['next_token']
+            if not changes['has_more']:
+                return pages
+
+    def sync_organizations(self):
+        # Aplicăm doar modificările de la ultimul token, fără să reîncărcăm tot tabelul
+        if self.change_token is None:
+            return
+        self.runner.run(
+            'sync', self.fetch_changes, self.change_token,
+            on_result=self.apply_changes,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not refresh organizations: {error}")
+        )
+
+    def apply_changes(self, pages):
+        for changes in pages:
+            for org_id in changes['deleted_organizations']:
+                self.model.remove_record(org_id)
+            for org in changes['organizations']:
+                self.model.upsert_record(org)
+            self.change_token = changes['next_token']
+
+    def run_action(self, action, org_id):
+        if action == 'edit':
+            self.show_edit_dialog(org_id)
+        elif action == 'delete':
+            self.delete_organization(org_id)
 
     def show_add_dialog(self):
         dialog = OrganizationDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_organizations()
+            # Rândul apare imediat din răspunsul serverului; sync doar avansează tokenul
+            self.model.upsert_record(dialog.saved)
+            self.sync_organizations()
             
     def show_edit_dialog(self, org_id):
-        try:
-            org = self.api_client.get_organization(org_id)
-            dialog = OrganizationDialog(self, org)
-            if dialog.exec() == QDialog.DialogCode.Accepted:
-                self.load_organizations()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not load organization: {str(e)}")
+        self.runner.run(
+            'open', self.api_client.get_organization, org_id,
+            on_result=self.open_edit_dialog,
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not load organization: {error}")
+        )
+
+    def open_edit_dialog(self, org):
+        dialog = OrganizationDialog(self, org)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.model.upsert_record(dialog.saved)
+            self.sync_organizations()
             
     def delete_organization(self, org_id):
-        try:
-            self.api_client.delete_organization(org_id)
-            self.load_organizations()  # Reîncărcăm lista după ștergere
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not delete organization: {str(e)}")
+        # Ștergerea e condiționată de versiunea afișată în tabel
+        record = self.model.record(org_id)
+        self.runner.run(
+            f'delete-{org_id}', self.api_client.delete_organization, org_id,
+            if_match=organization_etag(record) if record else None,
+            on_result=lambda _: self.organization_deleted(org_id),
+            on_error=lambda error: QMessageBox.critical(self, "Error", f"Could not delete organization: {error}")
+        )
+
+    def organization_deleted(self, org_id):
+        self.model.remove_record(org_id)
+        self.sync_organizations()  # Aplicăm restul modificărilor din flux
 
 class OrganizationDialog(QDialog):
     def __init__(self, parent=None, organization=None):
         super().__init__(parent)
-        self.api_client = APIClient()
+        self.api_client = shared_client()
+        self.runner = RequestRunner(self)
         self.organization = organization
+        self.saved = None
         self.init_ui()
         
     def init_ui(self):
@@ -227,6 +252,8 @@ class OrganizationDialog(QDialog):
         
         btn_save.clicked.connect(self.save_organization)
         btn_cancel.clicked.connect(self.reject)
+        # Cât timp salvarea e în curs, Save nu poate trimite încă o cerere
+        self.runner.busy_changed.connect(btn_save.setDisabled)
         
         buttons.addWidget(btn_save)
         buttons.addWidget(btn_cancel)
@@ -281,18 +308,29 @@ class OrganizationDialog(QDialog):
         """)
         
     def save_organization(self):
-        try:
-            data = {
-                'name': self.name_edit.text(),
-                'fiscal_code': self.fiscal_code_edit.text(),
-                'address': self.address_edit.text()
-            }
-            
-            if self.organization:
-                self.api_client.update_organization(self.organization['id'], data)
-            else:
-                self.api_client.create_organization(data)
-                
-            self.accept()
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Could not save organization: {str(e)}")
\ No newline at end of file
+        data = {
+            'name': self.name_edit.text(),
+            'fiscal_code': self.fiscal_code_edit.text(),
+            'address': self.address_edit.text()
+        }
+        
+        # Răspunsul e rândul salvat; view-ul îl aplică direct în model
+        if self.organization:
+            self.runner.run('save', self.api_client.update_organization, self.organization['id'], data,
+                            if_match=organization_etag(self.organization),
+                            on_result=self.saved_organization, on_error=self.save_failed)
+        else:
+            self.runner.run('save', self.api_client.create_organization, data,
+                            on_result=self.saved_organization, on_error=self.save_failed)
+
+    def saved_organization(self, org):
+        self.saved = org
+        self.accept()
+
+    def save_failed(self, error):
+        QMessageBox.critical(self, "Error", f"Could not save organization: {error}")
+
+    def done(self, result):
+        # Rezultatele sosite după închidere nu mai ajung la dialog
+        self.runner.cancel_all()
+        super().done(result)
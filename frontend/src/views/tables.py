@@ -0,0 +1,206 @@
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter
+
+# Câte rânduri aduce de la server fiecare fetchMore
+PAGE_SIZE = 200
+
+class RecordTableModel(QAbstractTableModel):
+    # Înregistrări (dict-uri cu 'id') ținute în memorie; view-ul cere doar celulele vizibile
+    COLUMNS = []
+    load_failed = pyqtSignal(str)
+
+    # Încărcările și paginile folosesc aceeași cheie: o listă nouă anulează pagina în curs
+    LOAD_KEY = 'rows'
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self.records = []
+        self.rows_by_id = {}
+        self.fetch_page = None
+        self.cursor = None
+        self.fetching = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.records)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.records[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_value(record, index.column())
+        if role == Qt.ItemDataRole.UserRole:
+            return record['id']
+        return None
+
+    def display_value(self, record, column):
+        raise NotImplementedError
+
+    def record(self, record_id):
+        row = self.rows_by_id.get(record_id)
+        return None if row is None else self.records[row]
+
+    def reindex(self, start=0):
+        for row in range(start, len(self.records)):
+            self.rows_by_id[self.records[row]['id']] = row
+
+    def set_records(self, records, fetch_page=None, cursor=None):
+        # fetch_page(cursor) -> (rânduri, cursorul următor sau None); fără el lista e completă
+        self.runner.cancel(self.LOAD_KEY)
+        self.fetching = False
+        self.beginResetModel()
+        self.records = []
+        self.rows_by_id = {}
+        for record in records:
+            if record['id'] not in self.rows_by_id:
+                self.rows_by_id[record['id']] = len(self.records)
+                self.records.append(record)
+        self.fetch_page = fetch_page
+        self.cursor = cursor
+        self.endResetModel()
+
+    def load(self, fetch, fetch_page=None, loaded=None):
+        # fetch() rulează în fundal și întoarce (rânduri, cursor, *extra); loaded(*extra) primește restul
+        def apply(result):
+            records, cursor, *extra = result
+            self.set_records(records, fetch_page, cursor)
+            if loaded is not None:
+                loaded(*extra)
+        self.fetching = True
+        self.runner.run(self.LOAD_KEY, fetch, on_result=apply, on_error=self.fetch_failed)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.fetch_page is not None and self.cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.fetching or not self.canFetchMore(parent):
+            return
+        self.fetching = True
+        self.runner.run(self.LOAD_KEY, self.fetch_page, self.cursor,
+                        on_result=self.page_fetched, on_error=self.fetch_failed)
+
+    def page_fetched(self, result):
+        records, self.cursor = result
+        self.fetching = False
+        self.append_records(records)
+
+    def fetch_failed(self, error):
+        self.cursor = None
+        self.fetching = False
+        self.load_failed.emit(error)
+
+    def append_records(self, records):
+        # Rândurile adăugate deja prin sincronizare nu se dublează când ajunge pagina lor
+        new_records = [record for record in records if record['id'] not in self.rows_by_id]
+        if not new_records:
+            return
+        first = len(self.records)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_records) - 1)
+        self.records.extend(new_records)
+        self.reindex(first)
+        self.endInsertRows()
+
+    def upsert_record(self, record):
+        row = self.rows_by_id.get(record['id'])
+        if row is None:
+            self.append_records([record])
+            return
+        self.records[row] = record
+        self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+    def remove_record(self, record_id):
+        row = self.rows_by_id.pop(record_id, None)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.records[row]
+        self.reindex(row)
+        self.endRemoveRows()
+
+    def update_column(self, column, update):
+        # update(record) întoarce rândul nou sau None; dict-urile primite nu se modifică pe loc,
+        # pot fi aceleași obiecte cu cele din cache-ul clientului
+        changed = []
+        for row, record in enumerate(self.records):
+            updated = update(record)
+            if updated is not None:
+                self.records[row] = updated
+                changed.append(row)
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], column), self.index(changed[-1], column))
+
+class ActionButtonsDelegate(QStyledItemDelegate):
+    # Butoanele sunt desenate, nu widget-uri pe rând; clicul emite (acțiune, id)
+    clicked = pyqtSignal(str, int)
+
+    BUTTON_WIDTH = 70
+    BUTTON_HEIGHT = 28
+    SPACING = 6
+    MARGIN = 4
+
+    def __init__(self, actions, parent=None):
+        # actions: [(nume, text, culoare, culoare la hover)]
+        super().__init__(parent)
+        self.actions = actions
+        self.hovered = None
+
+    def button_rects(self, rect):
+        top = rect.top() + (rect.height() - self.BUTTON_HEIGHT) // 2
+        return [
+            QRect(rect.left() + self.MARGIN + i * (self.BUTTON_WIDTH + self.SPACING), top,
+                  self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+            for i in range(len(self.actions))
+        ]
+
+    def action_at(self, rect, pos):
+        for (name, *_), button in zip(self.actions, self.button_rects(rect)):
+            if button.contains(pos):
+                return name
+        return None
+
+    def sizeHint(self, option, index):
+        width = 2 * self.MARGIN + len(self.actions) * (self.BUTTON_WIDTH + self.SPACING) - self.SPACING
+        return QSize(width, self.BUTTON_HEIGHT + 2 * self.MARGIN)
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        mouse_over = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        for (name, text, color, hover_color), button in zip(self.actions, self.button_rects(option.rect)):
+            hovered = mouse_over and self.hovered == (index.row(), name)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(hover_color if hovered else color))
+            painter.drawRoundedRect(button, 3, 3)
+            painter.setPen(QColor("white"))
+            painter.drawText(button, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseMove, QEvent.Type.MouseButtonPress,
+                                QEvent.Type.MouseButtonRelease):
+            return False
+        action = self.action_at(option.rect, event.position().toPoint())
+        if event.type() == QEvent.Type.MouseMove:
+            hovered = (index.row(), action) if action else None
+            if hovered != self.hovered:
+                self.hovered = hovered
+                if option.widget is not None:
+                    option.widget.viewport().update(option.rect)
+            return False
+        if action is None or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            self.clicked.emit(action, index.data(Qt.ItemDataRole.UserRole))
+        return True